@@ -0,0 +1,206 @@
+from flask import g, jsonify, request
+import math
+import threading
+import time
+
+# Request yang tidak dibatasi: halaman statis & endpoint statistik ini sendiri
+EXEMPT_PATHS = ('/api/admission/stats',)
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class _ClassLimiter:
+    """Concurrency limit for one traffic class, with a bounded wait"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_busy = 0
+        self.rejected_rate = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout):
+        started = time.perf_counter()
+        with self._cond:
+            if self.in_flight >= self.limit and timeout > 0:
+                self.waiting += 1
+                try:
+                    self._cond.wait_for(lambda: self.in_flight < self.limit, timeout)
+                finally:
+                    self.waiting -= 1
+
+            waited = (time.perf_counter() - started) * 1000
+            if self.in_flight >= self.limit:
+                self.rejected_busy += 1
+                return False
+
+            self.in_flight += 1
+            self.admitted += 1
+            self.wait_ms_total += waited
+            self.wait_ms_max = max(self.wait_ms_max, waited)
+            return True
+
+    def reject(self, reason):
+        with self._cond:
+            if reason == 'rate':
+                self.rejected_rate += 1
+            else:
+                self.rejected_busy += 1
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'rejected_busy': self.rejected_busy,
+                'rejected_rate': self.rejected_rate,
+                'wait_ms_avg': round(self.wait_ms_total / self.admitted, 3) if self.admitted else 0,
+                'wait_ms_max': round(self.wait_ms_max, 3)
+            }
+
+
+class _TokenBucket:
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now):
+        """Take one token; returns 0 on success or seconds until one is available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-process admission control for API traffic.
+
+    Requests are split into ``write`` (POST/PUT/PATCH/DELETE) and ``poll``
+    (GET) classes, each with its own concurrency limit and per-client token
+    bucket. Writes may wait briefly for a slot; polls are shed immediately
+    with 503 + Retry-After when their class is full or writes are queued.
+    Writes only queue when their limit is below the worker's thread count;
+    otherwise the poll limit alone keeps threads free for writes.
+    """
+
+    def __init__(self, config):
+        self.queue_timeout = {
+            'write': config['ADMISSION_WRITE_WAIT'],
+            'poll': config['ADMISSION_POLL_WAIT'],
+        }
+        self.limiters = {
+            'write': _ClassLimiter(config['ADMISSION_WRITE_CONCURRENCY']),
+            'poll': _ClassLimiter(config['ADMISSION_POLL_CONCURRENCY']),
+        }
+        self.rates = {
+            'write': (config['ADMISSION_WRITE_RATE'], config['ADMISSION_WRITE_BURST']),
+            'poll': (config['ADMISSION_POLL_RATE'], config['ADMISSION_POLL_BURST']),
+        }
+        self.max_clients = config['ADMISSION_MAX_CLIENTS']
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+
+    def _retry_after_rate(self, client, traffic_class):
+        now = time.monotonic()
+        with self._buckets_lock:
+            key = (client, traffic_class)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_clients:
+                    self._prune(now)
+                bucket = self._buckets[key] = _TokenBucket(*self.rates[traffic_class], now)
+            return bucket.take(now)
+
+    def _prune(self, now):
+        # Buang bucket yang sudah penuh lagi (client idle); tidak ada state yang hilang
+        idle = [
+            key for key, bucket in self._buckets.items()
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.burst
+        ]
+        for key in idle:
+            del self._buckets[key]
+
+    def admit(self, client, traffic_class):
+        """Returns None if admitted, otherwise an error response to send"""
+        limiter = self.limiters[traffic_class]
+
+        retry_after = self._retry_after_rate(client, traffic_class)
+        if retry_after:
+            limiter.reject('rate')
+            return _reject(429, 'Terlalu banyak request, coba lagi nanti', retry_after)
+
+        # Poll mengalah jika ada write yang sedang antre
+        if traffic_class == 'poll' and self.limiters['write'].waiting:
+            limiter.reject('busy')
+            return _reject(503, 'Server sedang sibuk, coba lagi nanti', 1)
+
+        if not limiter.acquire(self.queue_timeout[traffic_class]):
+            return _reject(503, 'Server sedang sibuk, coba lagi nanti', 1)
+        return None
+
+    def release(self, traffic_class):
+        self.limiters[traffic_class].release()
+
+    def stats(self):
+        with self._buckets_lock:
+            clients = len(self._buckets)
+        return {
+            'classes': {name: limiter.stats() for name, limiter in self.limiters.items()},
+            'tracked_clients': clients
+        }
+
+
+def _reject(status, message, retry_after):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _client_id():
+    # Entri terakhir X-Forwarded-For ditambahkan oleh proxy Render sendiri
+    forwarded = request.headers.get('X-Forwarded-For')
+    if forwarded:
+        return forwarded.split(',')[-1].strip()
+    return request.remote_addr or 'unknown'
+
+
+def init_admission(app):
+    """Register admission control hooks; returns the controller (None if disabled)"""
+    if not app.config['ADMISSION_ENABLED']:
+        return None
+    controller = AdmissionController(app.config)
+
+    @app.before_request
+    def _admit():
+        if not request.path.startswith('/api/') or request.path in EXEMPT_PATHS or request.method == 'OPTIONS':
+            return None
+        traffic_class = 'write' if request.method in WRITE_METHODS else 'poll'
+        rejection = controller.admit(_client_id(), traffic_class)
+        if rejection is not None:
+            return rejection
+        g.admission_class = traffic_class
+        return None
+
+    @app.teardown_request
+    def _release(exc):
+        traffic_class = g.pop('admission_class', None)
+        if traffic_class is not None:
+            controller.release(traffic_class)
+
+    return controller
@@ -0,0 +1,177 @@
+from models import db, Project, NonProject
+from sqlalchemy import select, literal, null, union_all
+from datetime import date
+import numpy as np
+
+GROUP_BY_OPTIONS = ('status', 'priority', 'location', 'category')
+ENTITY_OPTIONS = ('all', 'project', 'non_project')
+
+
+def _portfolio_query(entity):
+    # Satu query untuk project + non-project, hanya kolom yang dibutuhkan
+    project = select(
+        literal('project').label('entity'),
+        Project.id, Project.name, Project.status, Project.priority,
+        Project.location, null().label('category'),
+        Project.start_date, Project.end_date,
+        Project.budget, Project.actual_cost, Project.progress
+    )
+    non_project = select(
+        literal('non_project').label('entity'),
+        NonProject.id, NonProject.name, NonProject.status, null().label('priority'),
+        null().label('location'), NonProject.category,
+        NonProject.start_date, NonProject.end_date,
+        NonProject.budget, NonProject.actual_cost, NonProject.progress
+    )
+    if entity == 'project':
+        return project
+    if entity == 'non_project':
+        return non_project
+    return union_all(project, non_project)
+
+
+def _to_dates(values):
+    try:
+        return np.array(values, dtype='datetime64[D]')
+    except ValueError:
+        # Ada tanggal yang tidak valid: jadikan NaT, sisanya tetap dipakai
+        dates = np.empty(len(values), dtype='datetime64[D]')
+        for i, value in enumerate(values):
+            try:
+                dates[i] = np.datetime64(value, 'D')
+            except (TypeError, ValueError):
+                dates[i] = np.datetime64('NaT')
+        return dates
+
+
+def _ratio(numerator, denominator):
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+
+def _metrics(budget, planned_value, earned_value, actual_cost):
+    """Earned-value indices for arrays (or scalars) of totals"""
+    cpi = _ratio(earned_value, actual_cost)
+    spi = _ratio(earned_value, planned_value)
+    # EAC = BAC / CPI. Tanpa biaya aktual estimasi tetap = budget; sudah ada
+    # biaya tapi belum ada progress (CPI 0): EAC = AC + (BAC - EV)
+    eac = np.select(
+        [np.asarray(actual_cost) == 0, cpi > 0],
+        [budget, _ratio(budget, cpi)],
+        actual_cost + (budget - earned_value)
+    )
+    return {
+        'cpi': cpi,
+        'spi': spi,
+        'eac': eac,
+        'cost_variance': earned_value - actual_cost,
+        'schedule_variance': earned_value - planned_value,
+        'variance_at_completion': budget - eac
+    }
+
+
+def _clean(value):
+    value = float(value)
+    return round(value, 4) if np.isfinite(value) else None
+
+
+def earned_value_analysis(as_of=None, group_by='status', entity='all', include_items=False):
+    """Compute PV, EV, CPI, SPI and EAC for the whole portfolio in one pass"""
+    if group_by not in GROUP_BY_OPTIONS:
+        raise ValueError(f'group_by harus salah satu dari {", ".join(GROUP_BY_OPTIONS)}')
+    if entity not in ENTITY_OPTIONS:
+        raise ValueError(f'entity harus salah satu dari {", ".join(ENTITY_OPTIONS)}')
+    as_of = np.datetime64(as_of or date.today().isoformat(), 'D')
+
+    rows = db.session.execute(_portfolio_query(entity)).all()
+    columns = list(zip(*rows)) if rows else [()] * 12
+    (entities, ids, names, statuses, priorities, locations, categories,
+     start_dates, end_dates, budgets, actual_costs, progresses) = columns
+
+    budget = np.array(budgets, dtype=float)
+    actual_cost = np.nan_to_num(np.array(actual_costs, dtype=float))
+    progress = np.clip(np.nan_to_num(np.array(progresses, dtype=float)), 0, 100) / 100
+    start = _to_dates(start_dates)
+    end = _to_dates(end_dates)
+
+    # Planned % linear terhadap durasi, dibatasi 0-100%; tanggal invalid = 0
+    valid = ~(np.isnat(start) | np.isnat(end))
+    duration = np.where(valid, (end - start).astype('int64'), 1)
+    elapsed = np.where(valid, (as_of - start).astype('int64'), 0)
+    planned_pct = np.clip(elapsed / np.maximum(duration, 1), 0, 1)
+
+    planned_value = budget * planned_pct
+    earned_value = budget * progress
+
+    # Kolom group yang tidak dimiliki entity diisi nama tipenya
+    source = {'status': statuses, 'priority': priorities, 'location': locations, 'category': categories}[group_by]
+    fallback = np.where(np.array(entities, dtype=object) == 'project', 'Project', 'Non-Project')
+    keys = np.array(source, dtype=object)
+    keys = np.where((keys == None) | (keys == ''), fallback, keys).astype(str)  # noqa: E711
+
+    group_names, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(group_names))
+    sums = {
+        name: np.bincount(inverse, weights=values, minlength=len(group_names))
+        for name, values in (
+            ('budget', budget),
+            ('planned_value', planned_value),
+            ('earned_value', earned_value),
+            ('actual_cost', actual_cost)
+        )
+    }
+    group_metrics = _metrics(sums['budget'], sums['planned_value'], sums['earned_value'], sums['actual_cost'])
+
+    groups = []
+    for i, group in enumerate(group_names.tolist()):
+        entry = {'group': group, 'count': int(counts[i])}
+        entry.update({name: _clean(values[i]) for name, values in sums.items()})
+        entry.update({name: _clean(values[i]) for name, values in group_metrics.items()})
+        groups.append(entry)
+
+    totals = {name: float(values.sum()) for name, values in sums.items()}
+    totals.update({
+        name: _clean(value)
+        for name, value in _metrics(
+            totals['budget'], totals['planned_value'], totals['earned_value'], totals['actual_cost']
+        ).items()
+    })
+    totals['count'] = len(rows)
+
+    result = {
+        'as_of': str(as_of),
+        'group_by': group_by,
+        'entity': entity,
+        'totals': totals,
+        'groups': groups
+    }
+
+    if include_items:
+        item_metrics = _metrics(budget, planned_value, earned_value, actual_cost)
+        fields = {
+            'planned_value': planned_value,
+            'earned_value': earned_value,
+            **item_metrics
+        }
+        # NaN -> None sekaligus per kolom, baru dirangkai per baris
+        cleaned = {
+            name: [None if not np.isfinite(v) else round(v, 4) for v in values.tolist()]
+            for name, values in fields.items()
+        }
+        result['items'] = [
+            {
+                'entity': entities[i],
+                'id': ids[i],
+                'name': names[i],
+                'group': str(keys[i]),
+                'budget': budgets[i],
+                'actual_cost': actual_costs[i],
+                'progress': progresses[i],
+                **{name: cleaned[name][i] for name in fields}
+            }
+            for i in range(len(rows))
+        ]
+
+    return result
@@ -1,16 +1,31 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, send_file
 from flask_cors import CORS
-from models import db, Project, NonProject, Task, ManPower, Assignment
+from models import db, Project, NonProject, Task, ManPower, Assignment, ReportJob
+from schema import SCHEMA_VERSION, get_schema_version, migrate_database
+from analytics import earned_value_analysis
+from admission import init_admission
+from profiling import init_profiling, has_profile_token, list_profiles, get_profile
+from bulk import VersionConflict, bulk_update
+from deletes import delete_entity, purge_deleted
+from archive import archive_completed, archived_rows, get_archived
+from reports import ReportQueueFull, submit_report, pending_reports, default_report_dir
 from datetime import datetime
+from sqlalchemy.engine import make_url
+import click
 import os
+import time
 from dotenv import load_dotenv
 
+# Waktu mulai proses, dipakai untuk mengukur cold-start per worker
+_boot_started = time.perf_counter()
+
 # Load environment variables
 load_dotenv()
 
 # Inisialisasi Flask
 app = Flask(__name__)
 CORS(app)
+app.logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # ========== KONFIGURASI DATABASE UNTUK RENDER.COM ==========
 basedir = os.path.abspath(os.path.dirname(__file__))
@@ -23,21 +38,80 @@ if DATABASE_URL and DATABASE_URL.startswith('postgres://'):
     
 if DATABASE_URL:
     app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
-    print(f"✓ Menggunakan PostgreSQL: {DATABASE_URL[:50]}...")
 else:
     # Fallback ke SQLite untuk development
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(basedir, "monitoring.db")}'
-    print("✓ Menggunakan SQLite untuk development")
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# AUTO_MIGRATE=0: boot hanya membandingkan versi skema, migrasi dijalankan
+# manual lewat `flask --app app migrate-db`
+app.config['AUTO_MIGRATE'] = os.environ.get('AUTO_MIGRATE', '1') == '1'
+# Sample data hanya diisi saat skema baru dibuat (default: hanya SQLite lokal)
+app.config['SEED_ON_CREATE'] = os.environ.get('SEED_SAMPLE_DATA', '0' if DATABASE_URL else '1') == '1'
+
+# Report dibuat di process pool terpisah agar tidak memblokir worker gunicorn.
+# Kedua batas berlaku per worker gunicorn, bukan per host: satu host bisa
+# menjalankan WEB_CONCURRENCY x REPORT_WORKERS proses report sekaligus
+app.config['REPORT_WORKERS'] = int(os.environ.get('REPORT_WORKERS', 2))
+app.config['REPORT_MAX_PENDING'] = int(os.environ.get('REPORT_MAX_PENDING', 8))
+app.config['REPORT_DIR'] = os.environ.get('REPORT_DIR', default_report_dir())
+
+# Project/non-project/task Completed yang lebih tua dari ini dipindah ke archive
+app.config['ARCHIVE_AFTER_DAYS'] = int(os.environ.get('ARCHIVE_AFTER_DAYS', 365))
+app.config['ARCHIVE_BATCH_SIZE'] = int(os.environ.get('ARCHIVE_BATCH_SIZE', 500))
+
+# SOFT_DELETE=1: DELETE hanya menyembunyikan data, purge lewat `flask purge-deleted`
+app.config['SOFT_DELETE'] = os.environ.get('SOFT_DELETE', '0') == '1'
+
+# Profiling per request hanya aktif jika PROFILE_TOKEN di-set
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN')
+
+# Admission control per proses: write diprioritaskan di atas polling GET.
+# Batas default mengikuti jumlah thread per worker (gunicorn.conf.py): write
+# boleh memakai semua thread, polling paling banyak setengahnya. Dengan default
+# ini batas polling itulah satu-satunya prioritas write: slot write tidak
+# pernah penuh, jadi ADMISSION_WRITE_WAIT (dan poll yang mengalah ke write yang
+# antre) baru berlaku jika ADMISSION_WRITE_CONCURRENCY di-set < GUNICORN_THREADS
+WORKER_THREADS = int(os.environ.get('GUNICORN_THREADS', 8))
+app.config['ADMISSION_ENABLED'] = os.environ.get('ADMISSION_ENABLED', '1') == '1'
+app.config['ADMISSION_WRITE_CONCURRENCY'] = int(os.environ.get('ADMISSION_WRITE_CONCURRENCY', WORKER_THREADS))
+app.config['ADMISSION_POLL_CONCURRENCY'] = int(os.environ.get('ADMISSION_POLL_CONCURRENCY', max(1, WORKER_THREADS // 2)))
+app.config['ADMISSION_WRITE_WAIT'] = float(os.environ.get('ADMISSION_WRITE_WAIT', 5))  # detik
+app.config['ADMISSION_POLL_WAIT'] = float(os.environ.get('ADMISSION_POLL_WAIT', 0))
+app.config['ADMISSION_WRITE_RATE'] = float(os.environ.get('ADMISSION_WRITE_RATE', 5))  # request/detik per client
+app.config['ADMISSION_WRITE_BURST'] = float(os.environ.get('ADMISSION_WRITE_BURST', 20))
+# Satu load tab manpower = 1 GET + 1 GET per orang (grafik workload), diulang
+# tiap 30 detik; client = IP, jadi satu kantor di balik NAT berbagi bucket.
+# Default cukup untuk ~100 orang x beberapa tab dari IP yang sama
+app.config['ADMISSION_POLL_RATE'] = float(os.environ.get('ADMISSION_POLL_RATE', 20))
+app.config['ADMISSION_POLL_BURST'] = float(os.environ.get('ADMISSION_POLL_BURST', 300))
+app.config['ADMISSION_MAX_CLIENTS'] = int(os.environ.get('ADMISSION_MAX_CLIENTS', 10000))
+
 # Inisialisasi SQLAlchemy dengan app
 db.init_app(app)
+admission = init_admission(app)
+init_profiling(app)
+
+def soft_delete_requested():
+    """`?soft=1` / `?soft=0` overrides the SOFT_DELETE default per request"""
+    soft = request.args.get('soft')
+    if soft is None:
+        return app.config['SOFT_DELETE']
+    return soft in ('1', 'true')
+
+def include_archived():
+    """Opt-in `?include_archived=1`: also read from the archive tables"""
+    return request.args.get('include_archived') in ('1', 'true')
 
 # ========== NON-PROJECT API (LENGKAP) ==========
 @app.route('/api/non-projects/<int:non_project_id>', methods=['GET'])
 def get_non_project(non_project_id):
     with app.app_context():
+        if include_archived() and db.session.get(NonProject, non_project_id) is None:
+            archived = get_archived(NonProject, non_project_id)
+            if archived:
+                return jsonify(archived)
         non_project = NonProject.query.get_or_404(non_project_id)
         return jsonify(non_project.to_dict())
 
@@ -65,7 +139,10 @@ def update_non_project(non_project_id):
 def get_non_project_tasks(non_project_id):
     with app.app_context():
         tasks = Task.query.filter_by(non_project_id=non_project_id).all()
-        return jsonify([t.to_dict() for t in tasks])
+        result = [t.to_dict() for t in tasks]
+        if include_archived():
+            result += archived_rows(Task, non_project_id=non_project_id)
+        return jsonify(result)
 
 # ========== ROUTES ==========
 @app.route('/')
@@ -78,11 +155,18 @@ def index():
 def get_projects():
     with app.app_context():
         projects = Project.query.all()
-        return jsonify([p.to_dict() for p in projects])
+        result = [p.to_dict() for p in projects]
+        if include_archived():
+            result += archived_rows(Project)
+        return jsonify(result)
 
 @app.route('/api/projects/<int:project_id>', methods=['GET'])
 def get_project(project_id):
     with app.app_context():
+        if include_archived() and db.session.get(Project, project_id) is None:
+            archived = get_archived(Project, project_id)
+            if archived:
+                return jsonify(archived)
         project = Project.query.get_or_404(project_id)
         return jsonify(project.to_dict())
 
@@ -147,9 +231,8 @@ def update_project(project_id):
 def delete_project(project_id):
     try:
         with app.app_context():
-            project = Project.query.get_or_404(project_id)
-            db.session.delete(project)
-            db.session.commit()
+            Project.query.get_or_404(project_id)
+            delete_entity(Project, project_id, soft=soft_delete_requested())
             return jsonify({'message': 'Project deleted successfully'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -164,20 +247,29 @@ def get_project_s_curve(project_id):
 def get_project_tasks(project_id):
     with app.app_context():
         tasks = Task.query.filter_by(project_id=project_id).all()
-        return jsonify([t.to_dict() for t in tasks])
+        result = [t.to_dict() for t in tasks]
+        if include_archived():
+            result += archived_rows(Task, project_id=project_id)
+        return jsonify(result)
 
 @app.route('/api/projects/<int:project_id>/assignments', methods=['GET'])
 def get_project_assignments(project_id):
     with app.app_context():
         assignments = Assignment.query.filter_by(project_id=project_id).all()
-        return jsonify([a.to_dict() for a in assignments])
+        result = [a.to_dict() for a in assignments]
+        if include_archived():
+            result += archived_rows(Assignment, project_id=project_id)
+        return jsonify(result)
 
 # ========== NON-PROJECT API ==========
 @app.route('/api/non-projects', methods=['GET'])
 def get_non_projects():
     with app.app_context():
         non_projects = NonProject.query.all()
-        return jsonify([np.to_dict() for np in non_projects])
+        result = [np.to_dict() for np in non_projects]
+        if include_archived():
+            result += archived_rows(NonProject)
+        return jsonify(result)
 
 @app.route('/api/non-projects', methods=['POST'])
 def create_non_project():
@@ -206,9 +298,8 @@ def create_non_project():
 def delete_non_project(non_project_id):
     try:
         with app.app_context():
-            non_project = NonProject.query.get_or_404(non_project_id)
-            db.session.delete(non_project)
-            db.session.commit()
+            NonProject.query.get_or_404(non_project_id)
+            delete_entity(NonProject, non_project_id, soft=soft_delete_requested())
             return jsonify({'message': 'Non-project deleted successfully'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -227,7 +318,15 @@ def get_tasks():
             query = query.filter_by(non_project_id=non_project_id)
         
         tasks = query.all()
-        return jsonify([t.to_dict() for t in tasks])
+        result = [t.to_dict() for t in tasks]
+        if include_archived():
+            if project_id:
+                result += archived_rows(Task, project_id=int(project_id))
+            elif non_project_id:
+                result += archived_rows(Task, non_project_id=int(non_project_id))
+            else:
+                result += archived_rows(Task)
+        return jsonify(result)
 
 @app.route('/api/tasks', methods=['POST'])
 def create_task():
@@ -264,6 +363,18 @@ def delete_task(task_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@app.route('/api/bulk-update', methods=['POST'])
+def bulk_update_tasks_assignments():
+    """Set-based update of tasks/assignments matching a filter, in one transaction"""
+    try:
+        data = request.json or {}
+        with app.app_context():
+            return jsonify(bulk_update(data.get('operations')))
+    except VersionConflict as e:
+        return jsonify({'error': str(e), 'entity': e.entity, 'conflicts': e.conflicts}), 409
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
 # ========== MANPOWER API ==========
 @app.route('/api/manpower', methods=['GET'])
 def get_manpower():
@@ -322,9 +433,8 @@ def update_manpower(manpower_id):
 def delete_manpower(manpower_id):
     try:
         with app.app_context():
-            manpower = ManPower.query.get_or_404(manpower_id)
-            db.session.delete(manpower)
-            db.session.commit()
+            ManPower.query.get_or_404(manpower_id)
+            delete_entity(ManPower, manpower_id, soft=soft_delete_requested())
             return jsonify({'message': 'Manpower deleted successfully'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -333,14 +443,20 @@ def delete_manpower(manpower_id):
 def get_manpower_assignments(manpower_id):
     with app.app_context():
         assignments = Assignment.query.filter_by(manpower_id=manpower_id).all()
-        return jsonify([a.to_dict() for a in assignments])
+        result = [a.to_dict() for a in assignments]
+        if include_archived():
+            result += archived_rows(Assignment, manpower_id=manpower_id)
+        return jsonify(result)
 
 # ========== ASSIGNMENT API ==========
 @app.route('/api/assignments', methods=['GET'])
 def get_assignments():
     with app.app_context():
         assignments = Assignment.query.all()
-        return jsonify([a.to_dict() for a in assignments])
+        result = [a.to_dict() for a in assignments]
+        if include_archived():
+            result += archived_rows(Assignment)
+        return jsonify(result)
 
 @app.route('/api/assignments', methods=['POST'])
 def create_assignment():
@@ -375,6 +491,89 @@ def delete_assignment(assignment_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+# ========== REPORT API ==========
+@app.route('/api/reports', methods=['POST'])
+def create_report():
+    try:
+        data = request.json or {}
+        with app.app_context():
+            job, reused = submit_report(
+                data.get('report_type', 'portfolio'),
+                data.get('format', 'xlsx'),
+                data.get('period', datetime.utcnow().strftime('%Y-%m'))
+            )
+            result = job.to_dict()
+            result['cached'] = reused
+            return jsonify(result), 200 if reused else 202
+    except ReportQueueFull:
+        return jsonify({'error': 'Antrian report penuh, coba lagi nanti'}), 503, {'Retry-After': '30'}
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/reports/<job_id>', methods=['GET'])
+def get_report(job_id):
+    """Job status; clients poll this until status is Done or Failed"""
+    with app.app_context():
+        job = ReportJob.query.get_or_404(job_id)
+        if job.status in ('Queued', 'Running'):
+            return jsonify(job.to_dict()), 200, {'Retry-After': '2'}
+        return jsonify(job.to_dict())
+
+@app.route('/api/reports/<job_id>/download', methods=['GET'])
+def download_report(job_id):
+    with app.app_context():
+        job = ReportJob.query.get_or_404(job_id)
+        if job.status != 'Done' or not job.file_path or not os.path.exists(job.file_path):
+            return jsonify({'error': f'Report belum tersedia (status: {job.status})'}), 409
+        return send_file(
+            job.file_path,
+            as_attachment=True,
+            download_name=f'{job.report_type}-{job.period}.{job.format}'
+        )
+
+@app.route('/api/reports/stats', methods=['GET'])
+def get_report_stats():
+    return jsonify({'pending': pending_reports(), 'max_pending': app.config['REPORT_MAX_PENDING']})
+
+# ========== ANALYTICS API ==========
+@app.route('/api/analytics/earned-value', methods=['GET'])
+def get_earned_value():
+    try:
+        with app.app_context():
+            return jsonify(earned_value_analysis(
+                as_of=request.args.get('as_of'),
+                group_by=request.args.get('group_by', 'status'),
+                entity=request.args.get('entity', 'all'),
+                include_items=request.args.get('include_items') in ('1', 'true')
+            ))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+# ========== ADMISSION API ==========
+@app.route('/api/admission/stats', methods=['GET'])
+def get_admission_stats():
+    if admission is None:
+        return jsonify({'enabled': False})
+    stats = admission.stats()
+    stats['enabled'] = True
+    return jsonify(stats)
+
+# ========== PROFILING API ==========
+@app.route('/api/profiles', methods=['GET'])
+def get_profiles():
+    if not has_profile_token(app):
+        return jsonify({'error': 'Forbidden'}), 403
+    return jsonify(list_profiles())
+
+@app.route('/api/profiles/<profile_id>', methods=['GET'])
+def get_profile_detail(profile_id):
+    if not has_profile_token(app):
+        return jsonify({'error': 'Forbidden'}), 403
+    profile = get_profile(profile_id)
+    if profile is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(profile)
+
 # ========== DASHBOARD SUMMARY API ==========
 @app.route('/api/summary', methods=['GET'])
 def get_summary():
@@ -445,18 +644,75 @@ def get_summary():
 
 # ========== INITIALIZE DATABASE ==========
 def init_database():
-    """Initialize database with sample data"""
+    """Check the schema version on boot and migrate only when it is behind"""
+    timings = {'config': (time.perf_counter() - _boot_started) * 1000}
+    
     with app.app_context():
-        # Create tables
-        db.create_all()
+        started = time.perf_counter()
+        current = get_schema_version()
+        timings['version_check'] = (time.perf_counter() - started) * 1000
+        
+        if current < SCHEMA_VERSION:
+            if app.config['AUTO_MIGRATE']:
+                started = time.perf_counter()
+                from_version, to_version = migrate_database()
+                timings['migrate'] = (time.perf_counter() - started) * 1000
+                app.logger.info("Schema migrated from v%s to v%s", from_version, to_version)
+                
+                # Skema baru dibuat: isi sample data sekali saja
+                if from_version == 0 and app.config['SEED_ON_CREATE']:
+                    started = time.perf_counter()
+                    add_sample_data()
+                    timings['seed'] = (time.perf_counter() - started) * 1000
+            else:
+                app.logger.warning(
+                    "Schema v%s is behind v%s, run `flask --app app migrate-db`",
+                    current, SCHEMA_VERSION
+                )
         
-        # Check if we need sample data
-        if Project.query.count() == 0:
-            print("Adding sample data...")
-            add_sample_data()
-            print("Sample data added!")
-        else:
-            print(f"Database already has {Project.query.count()} projects")
+        # Jangan bawa koneksi boot ke worker hasil fork (gunicorn --preload)
+        db.engine.dispose()
+    
+    timings['total'] = (time.perf_counter() - _boot_started) * 1000
+    app.logger.info(
+        "Startup pid=%s db=%s schema=v%s %s",
+        os.getpid(),
+        make_url(app.config['SQLALCHEMY_DATABASE_URI']).get_backend_name(),
+        SCHEMA_VERSION,
+        ' '.join(f'{phase}={ms:.1f}ms' for phase, ms in timings.items())
+    )
+    return timings
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Apply pending schema migrations"""
+    from_version, to_version = migrate_database()
+    if from_version == to_version:
+        print(f"Schema sudah versi terbaru (v{to_version})")
+    else:
+        print(f"Schema dimigrasi dari v{from_version} ke v{to_version}")
+
+@app.cli.command('seed-db')
+def seed_db_command():
+    """Add sample data to an empty database"""
+    migrate_database()
+    if Project.query.first() is not None:
+        print("Database sudah berisi data, seed dilewati")
+        return
+    add_sample_data()
+    print("Sample data added!")
+
+@app.cli.command('archive-completed')
+def archive_completed_command():
+    """Move old Completed projects, non-projects and tasks to the archive tables"""
+    counts = archive_completed(app.config['ARCHIVE_AFTER_DAYS'], app.config['ARCHIVE_BATCH_SIZE'])
+    print("Diarsipkan: " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+
+@app.cli.command('purge-deleted')
+def purge_deleted_command():
+    """Permanently remove soft-deleted projects, non-projects and manpower"""
+    counts = purge_deleted()
+    print("Dihapus permanen: " + ", ".join(f"{count} {name}" for name, count in counts.items()))
 
 def add_sample_data():
     """Add comprehensive sample data"""
@@ -615,25 +871,25 @@ def add_sample_data():
             db.session.add(a)
         db.session.commit()
 
+def _imported_by_cli_command():
+    """True when a `flask` command other than `flask run` is loading the app"""
+    if os.environ.get('FLASK_RUN_FROM_CLI') != 'true':
+        return False
+    # Command buatan sendiri me-load app saat command di-resolve (context
+    # masih milik grup `flask`); `flask run` me-load app di dalam command-nya
+    ctx = click.get_current_context(silent=True)
+    return ctx is None or ctx.info_name != 'run'
+
+# migrate-db/seed-db mengatur skema sendiri: jangan migrasi/seed saat import
+if not _imported_by_cli_command():
+    init_database()
+
 # ========== RUN APPLICATION ==========
 if __name__ == '__main__':
     print("=" * 60)
     print("DASHBOARD MONITORING - PERTAMINA STYLE")
     print("=" * 60)
     
-    # Check if database exists (hanya untuk SQLite)
-    if 'sqlite' in app.config['SQLALCHEMY_DATABASE_URI']:
-        db_path = os.path.join(basedir, "monitoring.db")
-        if os.path.exists(db_path):
-            print(f"✓ Database ditemukan: {db_path}")
-            print("  Menggunakan database yang ada...")
-        else:
-            print(f"✗ Database tidak ditemukan")
-            print("  Membuat database baru...")
-    
-    # Initialize database
-    init_database()
-    
     print("\n" + "=" * 60)
     print("🚀 Server berjalan di: http://localhost:5000")
     print("📊 Dashboard siap digunakan!")
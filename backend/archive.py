@@ -0,0 +1,117 @@
+from models import db, Project, NonProject, Task, ManPower, Assignment, ARCHIVE_TABLES, VISIBLE_CONDITIONS, bump_data_version
+from sqlalchemy import select, insert, delete, or_
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+# Filter archived_rows yang menunjuk ke parent
+PARENT_KEYS = {'project_id': Project, 'non_project_id': NonProject, 'manpower_id': ManPower}
+
+
+def _move(model, condition):
+    """Copy matching hot rows into the archive table, then delete them"""
+    table = model.__table__
+    archive = ARCHIVE_TABLES[model]
+    names = [column.name for column in table.columns]
+
+    db.session.execute(
+        insert(archive).from_select(names, select(*[table.c[name] for name in names]).where(condition))
+    )
+    return db.session.execute(delete(table).where(condition)).rowcount
+
+
+def _archive_parents(model, cutoff, batch_size, counts):
+    table = model.__table__
+    fk = {Project: 'project_id', NonProject: 'non_project_id'}[model]
+
+    while True:
+        ids = db.session.execute(
+            select(table.c.id)
+            .where(table.c.status == 'Completed', table.c.end_date < cutoff, table.c.deleted_at.is_(None))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return
+
+        # Satu transaksi per batch: anak dulu, baru parent
+        counts['tasks'] += _move(Task, Task.__table__.c[fk].in_(ids))
+        counts['assignments'] += _move(Assignment, Assignment.__table__.c[fk].in_(ids))
+        counts[model.__tablename__ + 's'] += _move(model, table.c.id.in_(ids))
+        bump_data_version(db.session)
+        db.session.commit()
+
+
+def archive_completed(older_than_days, batch_size=500):
+    """Move Completed work that ended more than `older_than_days` ago into the archive tables.
+
+    Completed projects and non-projects are moved together with all their
+    tasks and assignments; Completed tasks whose due date is past the cutoff
+    are moved on their own. Runs in batches of `batch_size` rows so each
+    transaction stays short.
+    """
+    cutoff = (date.today() - timedelta(days=older_than_days)).isoformat()
+    counts = {'projects': 0, 'non_projects': 0, 'tasks': 0, 'assignments': 0}
+
+    _archive_parents(Project, cutoff, batch_size, counts)
+    _archive_parents(NonProject, cutoff, batch_size, counts)
+
+    task = Task.__table__
+    while True:
+        ids = db.session.execute(
+            select(task.c.id)
+            .where(task.c.status == 'Completed', task.c.due_date < cutoff, VISIBLE_CONDITIONS[Task])
+            .order_by(task.c.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        counts['tasks'] += _move(Task, task.c.id.in_(ids))
+        bump_data_version(db.session)
+        db.session.commit()
+
+    return counts
+
+
+@lru_cache(maxsize=None)
+def _dict_keys(model):
+    # Key to_dict() dari instance kosong: bentuk response sama dengan data hot
+    return tuple(model().to_dict())
+
+
+def archived_rows(model, **filters):
+    """Archived rows of `model` as dicts shaped like `to_dict()`, flagged `archived`"""
+    archive = ARCHIVE_TABLES[model]
+    # Id yang dipakai ulang bisa punya beberapa baris arsip: urut dari yang terlama
+    query = select(*[archive.c[name] for name in _dict_keys(model)]).order_by(
+        archive.c.id, archive.c.archived_at, archive.c.archive_id
+    )
+    for name, value in filters.items():
+        query = query.where(archive.c[name] == value)
+        parent = PARENT_KEYS.get(name)
+        if parent is not None:
+            # Id parent yang sudah diarsip/dihapus bisa dipakai ulang (SQLite
+            # tanpa AUTOINCREMENT): anak arsip yang lebih tua dari parent hot
+            # dengan id yang sama milik parent lama
+            parent_created = (
+                select(parent.__table__.c.created_at)
+                .where(parent.__table__.c.id == value)
+                .scalar_subquery()
+            )
+            query = query.where(or_(
+                parent_created.is_(None),
+                archive.c.created_at.is_(None),
+                archive.c.created_at >= parent_created
+            ))
+
+    rows = []
+    for row in db.session.execute(query).mappings():
+        item = {name: value.isoformat() if isinstance(value, datetime) else value for name, value in row.items()}
+        item['archived'] = True
+        rows.append(item)
+    return rows
+
+
+def get_archived(model, id):
+    """Most recently archived row with this original id, or None"""
+    rows = archived_rows(model, id=id)
+    return rows[-1] if rows else None
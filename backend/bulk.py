@@ -0,0 +1,206 @@
+from models import db, Task, Assignment, VISIBLE_CONDITIONS, bump_data_version
+from sqlalchemy import select, update, tuple_
+from datetime import datetime
+
+PRIORITIES = ('Low', 'Medium', 'High', 'Critical')
+
+
+class VersionConflict(Exception):
+    """Raised when rows changed since the client read them (optimistic check)"""
+
+    def __init__(self, entity, conflicts):
+        super().__init__(f'{len(conflicts)} {entity} sudah diubah oleh pengguna lain')
+        self.entity = entity
+        self.conflicts = conflicts
+
+
+# ========== VALIDATORS ==========
+def _text(value):
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError('harus berupa teks yang tidak kosong')
+    return value
+
+
+def _optional_text(value):
+    if value is not None and not isinstance(value, str):
+        raise ValueError('harus berupa teks')
+    return value
+
+
+def _date(value):
+    try:
+        datetime.strptime(value, '%Y-%m-%d')
+    except (TypeError, ValueError):
+        raise ValueError('harus berformat YYYY-MM-DD')
+    return value
+
+
+def _optional_date(value):
+    return None if value in (None, '') else _date(value)
+
+
+def _priority(value):
+    if value not in PRIORITIES:
+        raise ValueError(f'harus salah satu dari {", ".join(PRIORITIES)}')
+    return value
+
+
+def _progress(value):
+    value = float(value)
+    if not 0 <= value <= 100:
+        raise ValueError('harus di antara 0 dan 100')
+    return value
+
+
+def _non_negative_int(value):
+    value = int(value)
+    if value < 0:
+        raise ValueError('tidak boleh negatif')
+    return value
+
+
+# Field yang boleh di-patch per entity beserta validatornya
+PATCH_FIELDS = {
+    'task': {
+        'name': _text,
+        'description': _optional_text,
+        'pic': _text,
+        'due_date': _date,
+        'status': _text,
+        'action_plan': _text,
+        'priority': _priority,
+        'progress': _progress,
+    },
+    'assignment': {
+        'manpower_id': int,
+        'role': _text,
+        'hours_per_week': _non_negative_int,
+        'start_date': _optional_date,
+        'end_date': _optional_date,
+        'status': _text,
+    },
+}
+
+MODELS = {'task': Task, 'assignment': Assignment}
+
+# Kriteria filter yang dikenali per entity
+FILTER_FIELDS = {
+    'task': ('ids', 'project_id', 'non_project_id', 'status', 'pic', 'due_from', 'due_to'),
+    'assignment': ('ids', 'project_id', 'non_project_id', 'status', 'manpower_id'),
+}
+
+
+def _conditions(entity, filters):
+    model = MODELS[entity]
+    if not isinstance(filters, dict):
+        raise ValueError('filter harus berupa object')
+    # Kriteria yang salah ketik jangan diabaikan: filter jadi lebih luas dari maksudnya
+    unknown = [name for name in filters if name not in FILTER_FIELDS[entity]]
+    if unknown:
+        raise ValueError(f'Filter {", ".join(unknown)} tidak dikenal untuk {entity}')
+
+    conditions = []
+
+    if filters.get('ids'):
+        conditions.append(model.id.in_([int(i) for i in filters['ids']]))
+    for name in ('project_id', 'non_project_id'):
+        if filters.get(name) not in (None, ''):
+            conditions.append(getattr(model, name) == int(filters[name]))
+    if filters.get('status'):
+        statuses = filters['status'] if isinstance(filters['status'], list) else [filters['status']]
+        conditions.append(model.status.in_(statuses))
+
+    if entity == 'task':
+        if filters.get('pic'):
+            conditions.append(Task.pic == filters['pic'])
+        if filters.get('due_from'):
+            conditions.append(Task.due_date >= _date(filters['due_from']))
+        if filters.get('due_to'):
+            conditions.append(Task.due_date <= _date(filters['due_to']))
+    else:
+        if filters.get('manpower_id') not in (None, ''):
+            conditions.append(Assignment.manpower_id == int(filters['manpower_id']))
+
+    return conditions
+
+
+def _validate_patch(entity, patch):
+    fields = PATCH_FIELDS[entity]
+    if not isinstance(patch, dict) or not patch:
+        raise ValueError('patch tidak boleh kosong')
+
+    values = {}
+    for name, value in patch.items():
+        if name not in fields:
+            raise ValueError(f'Field {name} tidak bisa diubah untuk {entity}')
+        try:
+            values[name] = fields[name](value)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f'{entity}.{name} {e}')
+    return values
+
+
+def _apply(operation):
+    entity = operation.get('entity')
+    if entity not in MODELS:
+        raise ValueError(f'entity harus salah satu dari {", ".join(MODELS)}')
+    model = MODELS[entity]
+
+    values = _validate_patch(entity, operation.get('patch'))
+    conditions = _conditions(entity, operation.get('filter') or {})
+    if not conditions:
+        # Cegah update seluruh tabel karena filter lupa diisi
+        raise ValueError('filter minimal berisi satu kriteria')
+    # Bulk UPDATE tidak difilter listener soft delete: anak dari parent yang
+    # di-soft-delete harus dikecualikan eksplisit
+    conditions.append(VISIBLE_CONDITIONS[model])
+
+    # Optimistic check: {id: version} yang dibaca client sebelumnya.
+    # Baris dikunci dulu (FOR UPDATE) agar tidak berubah sebelum UPDATE jalan
+    versions = {int(k): int(v) for k, v in (operation.get('versions') or {}).items()}
+    if versions:
+        current = dict(db.session.execute(
+            select(model.id, model.version).where(model.id.in_(list(versions))).with_for_update()
+        ).all())
+        conflicts = [
+            {'id': id, 'expected_version': version, 'current_version': current.get(id)}
+            for id, version in versions.items()
+            if current.get(id) != version
+        ]
+        if conflicts:
+            raise VersionConflict(entity, conflicts)
+        conditions.append(tuple_(model.id, model.version).in_(list(versions.items())))
+
+    result = db.session.execute(
+        update(model)
+        .where(*conditions)
+        .values(**values, version=model.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+    return {'entity': entity, 'updated': result.rowcount}
+
+
+def bulk_update(operations):
+    """Run a list of predicate-based updates in a single transaction.
+
+    Each operation is ``{'entity': 'task' | 'assignment', 'filter': {...},
+    'patch': {...}, 'versions': {id: version}}``. Either every operation is
+    applied or, on a validation error or version conflict, none are.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise ValueError('operations tidak boleh kosong')
+
+    try:
+        results = [_apply(operation) for operation in operations]
+        if any(r['updated'] for r in results):
+            bump_data_version(db.session)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        'results': results,
+        'total_updated': sum(r['updated'] for r in results)
+    }
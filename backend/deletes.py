@@ -0,0 +1,70 @@
+from models import db, Project, NonProject, Task, ManPower, Assignment, bump_data_version
+from sqlalchemy import select, update, delete
+from datetime import datetime
+
+# Child yang ikut terhapus per parent: (model, kolom foreign key)
+CHILDREN = {
+    Project: ((Task, 'project_id'), (Assignment, 'project_id')),
+    NonProject: ((Task, 'non_project_id'), (Assignment, 'non_project_id')),
+    ManPower: ((Assignment, 'manpower_id'),),
+}
+
+
+def delete_entity(model, id, soft=False):
+    """Delete a project, non-project or manpower row with set-based statements.
+
+    Soft delete only stamps ``deleted_at`` on the parent, which hides it and
+    its children immediately; ``purge_deleted`` removes the rows later.
+    Hard delete removes children with one DELETE per child table instead of
+    loading them through the ORM cascade.
+    """
+    table = model.__table__
+    if soft:
+        db.session.execute(update(table).where(table.c.id == id).values(deleted_at=datetime.utcnow()))
+    else:
+        for child, fk in CHILDREN[model]:
+            db.session.execute(delete(child.__table__).where(child.__table__.c[fk] == id))
+        db.session.execute(delete(table).where(table.c.id == id))
+    bump_data_version(db.session)
+    db.session.commit()
+
+
+def purge_deleted(batch_size=1000):
+    """Physically remove soft-deleted rows, deleting children and parents in batches"""
+    counts = {'projects': 0, 'non_projects': 0, 'manpower': 0, 'tasks': 0, 'assignments': 0}
+    labels = {Project: 'projects', NonProject: 'non_projects', ManPower: 'manpower', Task: 'tasks', Assignment: 'assignments'}
+
+    for model, children in CHILDREN.items():
+        table = model.__table__
+        # Subquery, bukan daftar id: backlog besar tidak jadi IN (...) raksasa
+        hidden = select(table.c.id).where(table.c.deleted_at.isnot(None))
+
+        for child, fk in children:
+            child_table = child.__table__
+            while True:
+                # Batch kecil per transaksi agar lock tidak lama
+                batch = select(child_table.c.id).where(child_table.c[fk].in_(hidden)).limit(batch_size)
+                deleted = db.session.execute(
+                    delete(child_table).where(child_table.c.id.in_(batch.scalar_subquery()))
+                ).rowcount
+                db.session.commit()
+                counts[labels[child]] += deleted
+                if deleted < batch_size:
+                    break
+
+        while True:
+            batch = hidden.order_by(table.c.id).limit(batch_size).scalar_subquery()
+            # Anak yang masuk setelah sweep di atas ikut dihapus di transaksi
+            # parent: FK lama (tanpa ON DELETE CASCADE) tidak boleh gagal
+            for child, fk in children:
+                child_table = child.__table__
+                counts[labels[child]] += db.session.execute(
+                    delete(child_table).where(child_table.c[fk].in_(batch))
+                ).rowcount
+            deleted = db.session.execute(delete(table).where(table.c.id.in_(batch))).rowcount
+            db.session.commit()
+            counts[labels[model]] += deleted
+            if deleted < batch_size:
+                break
+
+    return counts
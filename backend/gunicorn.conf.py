@@ -0,0 +1,26 @@
+# Konfigurasi gunicorn: `gunicorn -c gunicorn.conf.py app:app`
+# (port diambil dari $PORT, jumlah worker dari $WEB_CONCURRENCY)
+import os
+import time
+
+# App di-load sekali di master (migrasi skema jalan sekali), worker hasil fork
+preload_app = True
+
+# Worker ber-thread: satu worker melayani beberapa request sekaligus sehingga
+# admission control (admission.py) bisa memprioritaskan write di atas polling.
+# Batas admission dihitung dari GUNICORN_THREADS yang sama
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+
+# Dengan preload_app, log "Startup" di app.py hanya dicetak sekali oleh
+# master; hook ini mencatat cold-start tiap worker hasil fork
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+
+
+def post_worker_init(worker):
+    worker.log.info(
+        "Worker ready pid=%s init=%.1fms",
+        worker.pid, (time.perf_counter() - worker.forked_at) * 1000
+    )
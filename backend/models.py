@@ -1,5 +1,10 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, update, select, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, with_loader_criteria
 from datetime import datetime
+from itertools import chain
+import sqlite3
 
 db = SQLAlchemy()
 
@@ -18,10 +23,14 @@ class Project(db.Model):
     longitude = db.Column(db.Float)
     progress = db.Column(db.Float, default=0)  # 0-100
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    deleted_at = db.Column(db.DateTime, index=True)  # Soft delete, di-purge belakangan
+    
+    # SQLite: id project/task yang diarsip atau dihapus tidak dipakai ulang
+    __table_args__ = {'sqlite_autoincrement': True}
     
     # Relationships
-    tasks = db.relationship('Task', backref='project', cascade='all, delete-orphan', lazy=True)
-    assignments = db.relationship('Assignment', backref='project', cascade='all, delete-orphan', lazy=True)
+    tasks = db.relationship('Task', backref='project', cascade='all, delete-orphan', passive_deletes=True, lazy=True)
+    assignments = db.relationship('Assignment', backref='project', cascade='all, delete-orphan', passive_deletes=True, lazy=True)
     
     def to_dict(self):
         return {
@@ -80,10 +89,13 @@ class NonProject(db.Model):
     actual_cost = db.Column(db.Float, default=0)
     progress = db.Column(db.Float, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    deleted_at = db.Column(db.DateTime, index=True)  # Soft delete, di-purge belakangan
+    
+    __table_args__ = {'sqlite_autoincrement': True}
     
     # Relationships
-    tasks = db.relationship('Task', backref='non_project', cascade='all, delete-orphan', lazy=True)
-    assignments = db.relationship('Assignment', backref='non_project', cascade='all, delete-orphan', lazy=True)
+    tasks = db.relationship('Task', backref='non_project', cascade='all, delete-orphan', passive_deletes=True, lazy=True)
+    assignments = db.relationship('Assignment', backref='non_project', cascade='all, delete-orphan', passive_deletes=True, lazy=True)
     
     def to_dict(self):
         return {
@@ -106,8 +118,8 @@ class Task(db.Model):
     description = db.Column(db.Text)
     
     # Foreign keys
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'))
-    non_project_id = db.Column(db.Integer, db.ForeignKey('non_project.id'))
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'))
+    non_project_id = db.Column(db.Integer, db.ForeignKey('non_project.id', ondelete='CASCADE'))
     
     pic = db.Column(db.String(100), nullable=False)
     due_date = db.Column(db.String(10), nullable=False)
@@ -116,6 +128,10 @@ class Task(db.Model):
     priority = db.Column(db.String(20), nullable=False)
     progress = db.Column(db.Float, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, server_default='1')  # Optimistic locking
+    
+    __table_args__ = {'sqlite_autoincrement': True}
+    __mapper_args__ = {'version_id_col': version}
     
     def to_dict(self):
         return {
@@ -130,6 +146,7 @@ class Task(db.Model):
             'action_plan': self.action_plan,
             'priority': self.priority,
             'progress': self.progress,
+            'version': self.version,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
@@ -143,9 +160,12 @@ class ManPower(db.Model):
     availability = db.Column(db.Float, default=100)  # Percentage
     total_hours = db.Column(db.Integer, default=40)  # Hours per week
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    deleted_at = db.Column(db.DateTime, index=True)  # Soft delete, di-purge belakangan
+    
+    __table_args__ = {'sqlite_autoincrement': True}
     
     # Relationships
-    assignments = db.relationship('Assignment', backref='manpower', cascade='all, delete-orphan', lazy=True)
+    assignments = db.relationship('Assignment', backref='manpower', cascade='all, delete-orphan', passive_deletes=True, lazy=True)
     
     def to_dict(self):
         return {
@@ -164,9 +184,9 @@ class Assignment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     
     # Foreign keys
-    manpower_id = db.Column(db.Integer, db.ForeignKey('man_power.id'), nullable=False)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'))
-    non_project_id = db.Column(db.Integer, db.ForeignKey('non_project.id'))
+    manpower_id = db.Column(db.Integer, db.ForeignKey('man_power.id', ondelete='CASCADE'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'))
+    non_project_id = db.Column(db.Integer, db.ForeignKey('non_project.id', ondelete='CASCADE'))
     
     role = db.Column(db.String(100), nullable=False)
     hours_per_week = db.Column(db.Integer, nullable=False)
@@ -174,6 +194,10 @@ class Assignment(db.Model):
     end_date = db.Column(db.String(10))
     status = db.Column(db.String(50), default='Active')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, server_default='1')  # Optimistic locking
+    
+    __table_args__ = {'sqlite_autoincrement': True}
+    __mapper_args__ = {'version_id_col': version}
     
     def to_dict(self):
         return {
@@ -186,5 +210,171 @@ class Assignment(db.Model):
             'start_date': self.start_date,
             'end_date': self.end_date,
             'status': self.status,
+            'version': self.version,
             'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+        }
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Selalu satu baris (id=1)
+    version = db.Column(db.Integer, nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_version'
+    
+    # Naik setiap ada perubahan data; dipakai sebagai kunci cache report
+    id = db.Column(db.Integer, primary_key=True)  # Selalu satu baris (id=1)
+    version = db.Column(db.Integer, nullable=False, default=1)
+
+
+class ReportJob(db.Model):
+    __tablename__ = 'report_job'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    report_type = db.Column(db.String(50), nullable=False)
+    format = db.Column(db.String(10), nullable=False)  # xlsx, pdf
+    period = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    status = db.Column(db.String(20), nullable=False, default='Queued')  # Queued, Running, Done, Failed
+    cache_key = db.Column(db.String(64), nullable=False, index=True)
+    data_version = db.Column(db.Integer, nullable=False)
+    file_path = db.Column(db.String(255))
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'report_type': self.report_type,
+            'format': self.format,
+            'period': self.period,
+            'status': self.status,
+            'data_version': self.data_version,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+def _archive_table(model, *indexes):
+    """Archive copy of a hot table: same columns, no foreign keys"""
+    columns = [
+        db.Column(column.name, column.type, nullable=column.nullable or column.primary_key, index=column.primary_key)
+        for column in model.__table__.columns
+    ]
+    return db.Table(
+        f'{model.__tablename__}_archive',
+        # id asli disimpan apa adanya; archive punya primary key sendiri
+        db.Column('archive_id', db.Integer, primary_key=True),
+        *columns,
+        db.Column('archived_at', db.DateTime, server_default=db.func.now()),
+        *[db.Index(f'ix_{model.__tablename__}_archive_{name}', name) for name in indexes]
+    )
+
+
+# Project/non-project Completed yang sudah lama dipindah ke sini beserta
+# task & assignment-nya (lihat archive.py)
+project_archive = _archive_table(Project)
+non_project_archive = _archive_table(NonProject)
+task_archive = _archive_table(Task, 'project_id', 'non_project_id')
+assignment_archive = _archive_table(Assignment, 'project_id', 'non_project_id', 'manpower_id')
+
+ARCHIVE_TABLES = {
+    Project: project_archive,
+    NonProject: non_project_archive,
+    Task: task_archive,
+    Assignment: assignment_archive,
+}
+
+
+DATA_MODELS = (Project, NonProject, Task, ManPower, Assignment)
+
+
+def bump_data_version(session):
+    """Mark the session's transaction as a data change; the version is bumped after commit"""
+    session.info['data_changed'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_data_changed_on_flush(session, flush_context):
+    if any(isinstance(obj, DATA_MODELS) for obj in chain(session.new, session.dirty, session.deleted)):
+        bump_data_version(session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_data_version_after_commit(session):
+    # UPDATE singkat di koneksi sendiri, di luar transaksi write: baris
+    # data_version tidak terkunci selama transaksi berjalan sehingga write
+    # paralel tidak saling menunggu di baris yang sama
+    if not session.info.pop('data_changed', False):
+        return
+    table = DataVersion.__table__
+    with session.get_bind(DataVersion).begin() as conn:
+        conn.execute(update(table).where(table.c.id == 1).values(version=table.c.version + 1))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_data_changed(session):
+    session.info.pop('data_changed', None)
+
+
+# ========== SOFT DELETE ==========
+SOFT_DELETE_MODELS = (Project, NonProject, ManPower)
+
+
+def _not_deleted(table, column):
+    # Core subquery (bukan ORM) agar tidak ikut difilter criteria di bawah
+    return or_(column.is_(None), column.not_in(select(table.c.id).where(table.c.deleted_at.isnot(None))))
+
+
+# Task/assignment milik parent yang di-soft-delete ikut tersembunyi
+_TASK_VISIBLE = (
+    _not_deleted(Project.__table__, Task.project_id)
+    & _not_deleted(NonProject.__table__, Task.non_project_id)
+)
+_ASSIGNMENT_VISIBLE = (
+    _not_deleted(Project.__table__, Assignment.project_id)
+    & _not_deleted(NonProject.__table__, Assignment.non_project_id)
+    & _not_deleted(ManPower.__table__, Assignment.manpower_id)
+)
+
+# Untuk statement Core/bulk yang tidak melewati listener di bawah
+VISIBLE_CONDITIONS = {
+    Task: _TASK_VISIBLE,
+    Assignment: _ASSIGNMENT_VISIBLE,
+}
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _hide_soft_deleted(orm_execute_state):
+    """Hide soft-deleted rows (and their tasks/assignments) from ORM selects.
+
+    Pass ``execution_options(include_deleted=True)`` to see them.
+    """
+    if (
+        not orm_execute_state.is_select
+        or orm_execute_state.is_column_load
+        or orm_execute_state.execution_options.get('include_deleted', False)
+    ):
+        return
+
+    orm_execute_state.statement = orm_execute_state.statement.options(
+        *[
+            with_loader_criteria(model, lambda cls: cls.deleted_at.is_(None), include_aliases=True)
+            for model in SOFT_DELETE_MODELS
+        ],
+        with_loader_criteria(Task, _TASK_VISIBLE, include_aliases=True),
+        with_loader_criteria(Assignment, _ASSIGNMENT_VISIBLE, include_aliases=True)
+    )
+
+
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite baru menjalankan ON DELETE CASCADE jika foreign_keys aktif
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
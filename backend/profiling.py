@@ -0,0 +1,190 @@
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from urllib.parse import urlencode
+import cProfile
+import hmac
+import pstats
+import threading
+import time
+import uuid
+
+# Collector SQL yang aktif di request/thread ini (bisa bertumpuk)
+_collectors = ContextVar('sql_collectors', default=())
+
+_profiles = deque(maxlen=50)
+_profiles_lock = threading.Lock()
+
+
+class QueryCollector:
+    """Records every SQL statement and ORM lazy load while active"""
+
+    def __init__(self):
+        self.statements = []
+        self.lazy_loads = 0
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    @property
+    def total_ms(self):
+        return round(sum(s['ms'] for s in self.statements), 3)
+
+
+@contextmanager
+def collect_queries():
+    collector = QueryCollector()
+    token = _collectors.set(_collectors.get() + (collector,))
+    try:
+        yield collector
+    finally:
+        _collectors.reset(token)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors.get()
+    if not collectors or not conn.info.get('query_started'):
+        return
+    elapsed = (time.perf_counter() - conn.info['query_started'].pop()) * 1000
+    entry = {'sql': statement, 'ms': round(elapsed, 3), 'executemany': executemany}
+    for collector in collectors:
+        collector.statements.append(entry)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _count_lazy_loads(orm_execute_state):
+    collectors = _collectors.get()
+    if collectors and orm_execute_state.is_relationship_load:
+        for collector in collectors:
+            collector.lazy_loads += 1
+
+
+def assert_query_budget(client, method, path, max_queries, max_lazy_loads=None, **kwargs):
+    """Call an endpoint through a Flask test client and fail if it exceeds its query budget.
+
+    Intended for tests, e.g.
+    ``assert_query_budget(client, 'DELETE', '/api/projects/1', max_queries=6)``.
+    Returns the response so the caller can assert on it as well.
+    """
+    with collect_queries() as collector:
+        response = client.open(path, method=method, **kwargs)
+
+    if collector.count > max_queries or (max_lazy_loads is not None and collector.lazy_loads > max_lazy_loads):
+        statements = '\n'.join(f"  {s['ms']:.2f}ms {s['sql']}" for s in collector.statements)
+        raise AssertionError(
+            f'{method} {path} ran {collector.count} queries (budget {max_queries}) '
+            f'and {collector.lazy_loads} lazy loads (budget {max_lazy_loads}):\n{statements}'
+        )
+    return response
+
+
+# ========== PER-REQUEST PROFILING ==========
+def has_profile_token(app):
+    """True if the request carries the configured `PROFILE_TOKEN`.
+
+    Prefer the header: a `?_profile=` token also ends up in proxy/access logs.
+    """
+    token = app.config.get('PROFILE_TOKEN')
+    if not token:
+        return False
+    supplied = request.headers.get('X-Profile-Token') or request.args.get('_profile')
+    return bool(supplied) and hmac.compare_digest(supplied, token)
+
+
+def _profile_summary(profiler, limit=25):
+    stats = pstats.Stats(profiler)
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {
+            'function': f'{filename}:{line}({name})',
+            'calls': calls,
+            'tottime_ms': round(tottime * 1000, 3),
+            'cumtime_ms': round(cumtime * 1000, 3)
+        }
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in rows
+    ]
+
+
+def _profiled_path():
+    # Token `_profile` tidak ikut disimpan di profile
+    args = [(name, value) for name, value in request.args.items(multi=True) if name != '_profile']
+    return request.path + ('?' + urlencode(args) if args else '')
+
+
+def init_profiling(app):
+    """Register the opt-in profiler (`X-Profile-Token` header or `?_profile=` flag)"""
+
+    @app.before_request
+    def _start_profile():
+        if not has_profile_token(app):
+            return
+        g.profile_collector_cm = collect_queries()
+        g.profile_collector = g.profile_collector_cm.__enter__()
+        g.profile_started = time.perf_counter()
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    @app.after_request
+    def _finish_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        collector = g.profile_collector
+
+        profile = {
+            'id': uuid.uuid4().hex,
+            'method': request.method,
+            'path': _profiled_path(),
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.profile_started) * 1000, 3),
+            'query_count': collector.count,
+            'query_ms': collector.total_ms,
+            'lazy_loads': collector.lazy_loads,
+            'queries': collector.statements,
+            'profile': _profile_summary(profiler),
+            'created_at': datetime.utcnow().isoformat()
+        }
+        with _profiles_lock:
+            _profiles.append(profile)
+
+        response.headers['X-Profile-Id'] = profile['id']
+        response.headers['X-Query-Count'] = str(profile['query_count'])
+        response.headers['X-Query-Time-Ms'] = str(profile['query_ms'])
+        response.headers['X-Lazy-Load-Count'] = str(profile['lazy_loads'])
+        return response
+
+    @app.teardown_request
+    def _close_profile(exc):
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+        cm = g.pop('profile_collector_cm', None)
+        if cm is not None:
+            cm.__exit__(None, None, None)
+
+
+def list_profiles():
+    with _profiles_lock:
+        return [
+            {key: value for key, value in p.items() if key not in ('queries', 'profile')}
+            for p in reversed(_profiles)
+        ]
+
+
+def get_profile(profile_id):
+    with _profiles_lock:
+        return next((p for p in _profiles if p['id'] == profile_id), None)
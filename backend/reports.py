@@ -0,0 +1,321 @@
+from models import db, Project, NonProject, Task, DataVersion, ReportJob
+from flask import current_app
+from sqlalchemy import create_engine, select, update, delete, func, literal, or_
+from concurrent.futures import ProcessPoolExecutor
+from calendar import monthrange
+from datetime import datetime, timedelta
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import uuid
+
+REPORT_TYPES = ('portfolio',)
+REPORT_FORMATS = ('xlsx', 'pdf')
+
+# Job Queued/Running yang lebih tua dari ini dianggap mati (worker restart)
+STALE_JOB_AFTER = timedelta(minutes=15)
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = set()
+
+
+class ReportQueueFull(Exception):
+    """Raised when this process already has the maximum number of pending reports"""
+
+
+# ========== PARENT (FLASK WORKER) ==========
+def _get_pool():
+    # Pool dibuat per proses gunicorn, setelah fork
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=current_app.config['REPORT_WORKERS'],
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def _job_finished(future):
+    with _pool_lock:
+        _pending.discard(future)
+
+
+def parse_period(period):
+    """Validate a YYYY-MM period, returns (first_day, last_day) as date strings"""
+    if not period or not re.match(r'^\d{4}-\d{2}$', period):
+        raise ValueError('period harus berformat YYYY-MM')
+    year, month = int(period[:4]), int(period[5:])
+    if not 1 <= month <= 12:
+        raise ValueError('period harus berformat YYYY-MM')
+    return f'{period}-01', f'{period}-{monthrange(year, month)[1]:02d}'
+
+
+def current_data_version():
+    return db.session.execute(
+        select(DataVersion.version).where(DataVersion.id == 1)
+    ).scalar() or 0
+
+
+def report_cache_key(report_type, fmt, period, data_version):
+    raw = f'{report_type}:{fmt}:{period}:{data_version}'
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def submit_report(report_type, fmt, period):
+    """Queue a report job, or return an existing job for the same data version.
+
+    Returns (job, reused).
+    """
+    if report_type not in REPORT_TYPES:
+        raise ValueError(f'report_type harus salah satu dari {", ".join(REPORT_TYPES)}')
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f'format harus salah satu dari {", ".join(REPORT_FORMATS)}')
+    parse_period(period)
+
+    data_version = current_data_version()
+    cache_key = report_cache_key(report_type, fmt, period, data_version)
+
+    # Report identik (data belum berubah) sudah ada atau sedang dibuat
+    existing = ReportJob.query.filter(
+        ReportJob.cache_key == cache_key,
+        ReportJob.status != 'Failed'
+    ).order_by(ReportJob.created_at.desc()).first()
+    if existing:
+        if existing.status == 'Done' and existing.file_path and os.path.exists(existing.file_path):
+            return existing, True
+        if existing.status in ('Queued', 'Running') and existing.created_at > datetime.utcnow() - STALE_JOB_AFTER:
+            return existing, True
+
+    with _pool_lock:
+        if len(_pending) >= current_app.config['REPORT_MAX_PENDING']:
+            raise ReportQueueFull()
+
+    job = ReportJob(
+        id=uuid.uuid4().hex,
+        report_type=report_type,
+        format=fmt,
+        period=period,
+        status='Queued',
+        cache_key=cache_key,
+        data_version=data_version
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    future = _get_pool().submit(
+        render_report,
+        job.id,
+        current_app.config['SQLALCHEMY_DATABASE_URI'],
+        current_app.config['REPORT_DIR'],
+        fmt,
+        period
+    )
+    with _pool_lock:
+        _pending.add(future)
+    future.add_done_callback(_job_finished)
+
+    return job, False
+
+
+def pending_reports():
+    with _pool_lock:
+        return len(_pending)
+
+
+# ========== CHILD (REPORT PROCESS) ==========
+def render_report(job_id, database_uri, output_dir, fmt, period):
+    """Render one report in a pool process and record the result on its job row"""
+    engine = create_engine(database_uri)
+    jobs = ReportJob.__table__
+
+    def set_job(**values):
+        with engine.begin() as conn:
+            conn.execute(update(jobs).where(jobs.c.id == job_id).values(**values))
+
+    try:
+        set_job(status='Running')
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f'{job_id}.{fmt}')
+
+        with engine.connect() as conn:
+            # Server-side cursor: baris dibaca bertahap, tidak dimuat sekaligus
+            conn = conn.execution_options(stream_results=True, yield_per=500)
+            sections = _portfolio_sections(conn, period)
+            if fmt == 'xlsx':
+                _write_xlsx(sections, path)
+            else:
+                _write_pdf(sections, path, f'Portfolio Report {period}')
+
+        set_job(status='Done', file_path=path, finished_at=datetime.utcnow())
+        _remove_superseded(engine, job_id)
+    except Exception as e:
+        set_job(status='Failed', error=str(e), finished_at=datetime.utcnow())
+    finally:
+        engine.dispose()
+
+
+def _remove_superseded(engine, job_id):
+    """Delete jobs (and files) of older data versions for the same report.
+
+    Their cache key can never match again once the data version moved on.
+    """
+    jobs = ReportJob.__table__
+    with engine.begin() as conn:
+        job = conn.execute(select(jobs).where(jobs.c.id == job_id)).one()
+        superseded = conn.execute(
+            select(jobs.c.id, jobs.c.file_path).where(
+                jobs.c.report_type == job.report_type,
+                jobs.c.format == job.format,
+                jobs.c.period == job.period,
+                jobs.c.data_version < job.data_version,
+                # Job lama yang masih jalan dibiarkan, kecuali sudah mati
+                or_(jobs.c.status.in_(('Done', 'Failed')), jobs.c.created_at < datetime.utcnow() - STALE_JOB_AFTER)
+            )
+        ).all()
+        if superseded:
+            conn.execute(delete(jobs).where(jobs.c.id.in_([row.id for row in superseded])))
+
+    for row in superseded:
+        if row.file_path:
+            try:
+                os.remove(row.file_path)
+            except FileNotFoundError:
+                pass
+
+
+def _variance(budget, actual_cost):
+    return (budget or 0) - (actual_cost or 0)
+
+
+def _portfolio_sections(conn, period):
+    """Yield (title, headers, rows) per section; rows are lazy iterators"""
+    first_day, last_day = parse_period(period)
+    project = Project.__table__
+    non_project = NonProject.__table__
+    task = Task.__table__
+
+    # Project/non-project yang aktif di periode ini (tanpa yang di-soft-delete)
+    active_projects = select(project).where(
+        project.c.start_date <= last_day, project.c.end_date >= first_day,
+        project.c.deleted_at.is_(None)
+    ).order_by(project.c.id)
+    active_non_projects = select(non_project).where(
+        non_project.c.start_date <= last_day, non_project.c.end_date >= first_day,
+        non_project.c.deleted_at.is_(None)
+    ).order_by(non_project.c.id)
+
+    yield 'Projects', [
+        'Name', 'Status', 'Priority', 'Location', 'Start Date', 'End Date',
+        'Progress (%)', 'Budget', 'Actual Cost', 'Variance'
+    ], (
+        [r.name, r.status, r.priority, r.location, r.start_date, r.end_date,
+         r.progress, r.budget, r.actual_cost, _variance(r.budget, r.actual_cost)]
+        for r in conn.execute(active_projects)
+    )
+
+    yield 'Non-Projects', [
+        'Name', 'Category', 'Status', 'Start Date', 'End Date',
+        'Progress (%)', 'Budget', 'Actual Cost', 'Variance'
+    ], (
+        [r.name, r.category, r.status, r.start_date, r.end_date,
+         r.progress, r.budget, r.actual_cost, _variance(r.budget, r.actual_cost)]
+        for r in conn.execute(active_non_projects)
+    )
+
+    tasks_due = select(
+        task,
+        func.coalesce(project.c.name, non_project.c.name).label('parent_name')
+    ).select_from(
+        task.outerjoin(project, task.c.project_id == project.c.id)
+            .outerjoin(non_project, task.c.non_project_id == non_project.c.id)
+    ).where(
+        task.c.due_date >= first_day, task.c.due_date <= last_day,
+        project.c.deleted_at.is_(None), non_project.c.deleted_at.is_(None)
+    ).order_by(task.c.due_date)
+
+    yield 'Tasks', [
+        'Name', 'Project / Non-Project', 'PIC', 'Due Date', 'Status', 'Priority', 'Progress (%)'
+    ], (
+        [r.name, r.parent_name, r.pic, r.due_date, r.status, r.priority, r.progress]
+        for r in conn.execute(tasks_due)
+    )
+
+    def s_curve_rows():
+        for r in conn.execute(active_projects):
+            curve = Project(progress=r.progress or 0).get_s_curve_data()
+            yield [r.name, 'Planned'] + curve['planned']
+            yield [r.name, 'Actual'] + curve['actual']
+
+    months = Project(progress=0).get_s_curve_data()['labels']
+    yield 'S-Curves', ['Project', 'Series'] + months, s_curve_rows()
+
+    def grouped(table, label):
+        return select(
+            literal(label).label('type'),
+            table.c.status,
+            func.count().label('count'),
+            func.coalesce(func.sum(table.c.budget), 0).label('budget'),
+            func.coalesce(func.sum(table.c.actual_cost), 0).label('actual_cost')
+        ).where(
+            table.c.start_date <= last_day, table.c.end_date >= first_day,
+            table.c.deleted_at.is_(None)
+        ).group_by(table.c.status).order_by(table.c.status)
+
+    def variance_rows():
+        for query in (grouped(project, 'Project'), grouped(non_project, 'Non-Project')):
+            for r in conn.execute(query):
+                yield [r.type, r.status, r.count, r.budget, r.actual_cost, _variance(r.budget, r.actual_cost)]
+
+    yield 'Budget Variance', ['Type', 'Status', 'Count', 'Budget', 'Actual Cost', 'Variance'], variance_rows()
+
+
+def _write_xlsx(sections, path):
+    from openpyxl import Workbook
+
+    # write_only: baris langsung ditulis, memori tetap kecil
+    workbook = Workbook(write_only=True)
+    for title, headers, rows in sections:
+        sheet = workbook.create_sheet(title)
+        sheet.append(headers)
+        for row in rows:
+            sheet.append(row)
+    workbook.save(path)
+
+
+def _write_pdf(sections, path, title):
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    story = [Paragraph(title, styles['Title'])]
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#0055a4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('FONTSIZE', (0, 0), (-1, -1), 7),
+        ('GRID', (0, 0), (-1, -1), 0.25, colors.grey),
+    ])
+
+    for section_title, headers, rows in sections:
+        story.append(Paragraph(section_title, styles['Heading2']))
+        data = [headers] + [
+            ['' if value is None else f'{value:,.2f}' if isinstance(value, float) else str(value) for value in row]
+            for row in rows
+        ]
+        if len(data) == 1:
+            story.append(Paragraph('Tidak ada data', styles['Normal']))
+        else:
+            story.append(Table(data, repeatRows=1, style=table_style))
+        story.append(Spacer(1, 12))
+
+    SimpleDocTemplate(path, pagesize=landscape(A4)).build(story)
+
+
+def default_report_dir():
+    return os.path.join(tempfile.gettempdir(), 'dashboard-reports')
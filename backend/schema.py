@@ -0,0 +1,240 @@
+from models import db, SchemaVersion
+from sqlalchemy import (
+    MetaData, Table, Column, Index, Integer, Float, String, Text, DateTime,
+    func, inspect, insert, select, text
+)
+from sqlalchemy.exc import SQLAlchemyError
+from datetime import datetime
+
+# Versi 1 adalah skema awal (tabel hasil db.create_all()).
+# Perubahan skema berikutnya ditambahkan sebagai (versi, fungsi) di MIGRATIONS;
+# langkah yang sudah dirilis jangan diubah lagi. Setiap langkah memakai DDL
+# yang dibekukan pada versinya sendiri, bukan model saat ini: model sudah
+# berisi kolom dari versi-versi berikutnya.
+BASELINE_VERSION = 1
+
+
+def _connection():
+    # DDL ikut transaksi session agar satu langkah = satu commit
+    return db.session.connection()
+
+
+def _has_column(table, column):
+    return any(c['name'] == column for c in inspect(_connection()).get_columns(table))
+
+
+def _add_column(table, column, ddl):
+    if not _has_column(table, column):
+        db.session.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+
+# ========== v2: report jobs ==========
+_v2 = MetaData()
+_v2_data_version = Table(
+    'data_version', _v2,
+    Column('id', Integer, primary_key=True),
+    Column('version', Integer, nullable=False),
+)
+Table(
+    'report_job', _v2,
+    Column('id', String(32), primary_key=True),
+    Column('report_type', String(50), nullable=False),
+    Column('format', String(10), nullable=False),
+    Column('period', String(7), nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('cache_key', String(64), nullable=False, index=True),
+    Column('data_version', Integer, nullable=False),
+    Column('file_path', String(255)),
+    Column('error', Text),
+    Column('created_at', DateTime),
+    Column('finished_at', DateTime),
+)
+
+
+def _ensure_data_version_row():
+    exists = db.session.execute(select(_v2_data_version.c.id).where(_v2_data_version.c.id == 1)).first()
+    if exists is None:
+        db.session.execute(insert(_v2_data_version).values(id=1, version=1))
+
+
+def _add_report_tables():
+    _v2.create_all(bind=_connection())
+    _ensure_data_version_row()
+    db.session.commit()
+
+
+# ========== v3: archive tables ==========
+# Kolom hot table pada versi 3 (sebelum version/deleted_at)
+_V3_COLUMNS = {
+    'project': lambda: [
+        Column('name', String(100), nullable=False),
+        Column('description', Text),
+        Column('status', String(50), nullable=False),
+        Column('priority', String(20), nullable=False),
+        Column('start_date', String(10), nullable=False),
+        Column('end_date', String(10), nullable=False),
+        Column('budget', Float, nullable=False),
+        Column('actual_cost', Float),
+        Column('location', String(100)),
+        Column('latitude', Float),
+        Column('longitude', Float),
+        Column('progress', Float),
+        Column('created_at', DateTime),
+    ],
+    'non_project': lambda: [
+        Column('name', String(100), nullable=False),
+        Column('category', String(50), nullable=False),
+        Column('description', Text),
+        Column('status', String(50), nullable=False),
+        Column('start_date', String(10), nullable=False),
+        Column('end_date', String(10), nullable=False),
+        Column('budget', Float, nullable=False),
+        Column('actual_cost', Float),
+        Column('progress', Float),
+        Column('created_at', DateTime),
+    ],
+    'task': lambda: [
+        Column('name', String(100), nullable=False),
+        Column('description', Text),
+        Column('project_id', Integer),
+        Column('non_project_id', Integer),
+        Column('pic', String(100), nullable=False),
+        Column('due_date', String(10), nullable=False),
+        Column('status', String(50), nullable=False),
+        Column('action_plan', Text, nullable=False),
+        Column('priority', String(20), nullable=False),
+        Column('progress', Float),
+        Column('created_at', DateTime),
+    ],
+    'assignment': lambda: [
+        Column('manpower_id', Integer, nullable=False),
+        Column('project_id', Integer),
+        Column('non_project_id', Integer),
+        Column('role', String(100), nullable=False),
+        Column('hours_per_week', Integer, nullable=False),
+        Column('start_date', String(10)),
+        Column('end_date', String(10)),
+        Column('status', String(50)),
+        Column('created_at', DateTime),
+    ],
+}
+_V3_INDEXES = {
+    'project': (),
+    'non_project': (),
+    'task': ('project_id', 'non_project_id'),
+    'assignment': ('project_id', 'non_project_id', 'manpower_id'),
+}
+
+_v3 = MetaData()
+for _name, _columns in _V3_COLUMNS.items():
+    Table(
+        f'{_name}_archive', _v3,
+        Column('archive_id', Integer, primary_key=True),
+        Column('id', Integer, index=True),
+        *_columns(),
+        Column('archived_at', DateTime, server_default=func.now()),
+        *[Index(f'ix_{_name}_archive_{column}', column) for column in _V3_INDEXES[_name]]
+    )
+
+
+def _add_archive_tables():
+    _v3.create_all(bind=_connection())
+    db.session.commit()
+
+
+# ========== v4: optimistic locking ==========
+def _add_version_columns():
+    for table in ('task', 'assignment', 'task_archive', 'assignment_archive'):
+        _add_column(table, 'version', 'INTEGER NOT NULL DEFAULT 1')
+    db.session.commit()
+
+
+# ========== v5: soft delete + ON DELETE CASCADE ==========
+def _add_soft_delete_and_cascade():
+    for table in ('project', 'non_project', 'man_power'):
+        _add_column(table, 'deleted_at', 'TIMESTAMP')
+        db.session.execute(text(f'CREATE INDEX IF NOT EXISTS ix_{table}_deleted_at ON {table} (deleted_at)'))
+    for table in ('project_archive', 'non_project_archive'):
+        _add_column(table, 'deleted_at', 'TIMESTAMP')
+
+    # Foreign key lama dibuat ulang dengan ON DELETE CASCADE. SQLite tidak bisa
+    # mengubah constraint; di sana child tetap dihapus eksplisit (deletes.py)
+    if db.engine.dialect.name == 'postgresql':
+        inspector = inspect(_connection())
+        foreign_keys = [
+            (table, fk) for table in ('task', 'assignment') for fk in inspector.get_foreign_keys(table)
+        ]
+        for table, fk in foreign_keys:
+            column = fk['constrained_columns'][0]
+            db.session.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT {fk["name"]}'))
+            db.session.execute(text(
+                f'ALTER TABLE {table} ADD CONSTRAINT {fk["name"]} FOREIGN KEY ({column}) '
+                f'REFERENCES {fk["referred_table"]} (id) ON DELETE CASCADE'
+            ))
+    db.session.commit()
+
+
+MIGRATIONS = [
+    (2, _add_report_tables),
+    (3, _add_archive_tables),
+    (4, _add_version_columns),
+    (5, _add_soft_delete_and_cascade),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0] if MIGRATIONS else BASELINE_VERSION
+
+
+def get_schema_version():
+    """Return the stored schema version, or 0 if the database is not versioned yet"""
+    try:
+        version = db.session.execute(
+            select(SchemaVersion.version).where(SchemaVersion.id == 1)
+        ).scalar()
+    except SQLAlchemyError:
+        # Tabel schema_version belum ada
+        db.session.rollback()
+        return 0
+    return version or 0
+
+
+def _set_schema_version(version):
+    row = db.session.get(SchemaVersion, 1)
+    if row is None:
+        row = SchemaVersion(id=1, version=version)
+        db.session.add(row)
+    else:
+        row.version = version
+        row.applied_at = datetime.utcnow()
+    db.session.commit()
+
+
+def migrate_database():
+    """Bring the schema up to SCHEMA_VERSION, returns (from_version, to_version).
+
+    ``from_version`` is 0 only when the schema was created on an empty
+    database; a pre-versioning database is adopted as BASELINE_VERSION.
+    """
+    current = get_schema_version()
+    if current >= SCHEMA_VERSION:
+        return current, current
+    
+    if current == 0:
+        if inspect(db.engine).has_table('project'):
+            # Database lama sebelum ada versioning: anggap skema awal, hanya
+            # tabel schema_version yang dibuat (tabel lain lewat MIGRATIONS)
+            SchemaVersion.__table__.create(bind=_connection(), checkfirst=True)
+            _set_schema_version(BASELINE_VERSION)
+            current = BASELINE_VERSION
+        else:
+            # Database kosong: create_all sudah menghasilkan skema terbaru
+            db.create_all()
+            _ensure_data_version_row()
+            _set_schema_version(SCHEMA_VERSION)
+            return 0, SCHEMA_VERSION
+    
+    for version, step in MIGRATIONS:
+        if version > current:
+            step()
+            _set_schema_version(version)
+    
+    return current, SCHEMA_VERSION
@@ -0,0 +1,34 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Modul backend diimpor sebagai top-level module (seperti di gunicorn)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmpdir = tempfile.mkdtemp(prefix='dashboard-tests-')
+os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(_tmpdir, "test.db")}'
+os.environ['REPORT_DIR'] = os.path.join(_tmpdir, 'reports')
+os.environ['SEED_SAMPLE_DATA'] = '0'
+os.environ['ADMISSION_ENABLED'] = '0'
+
+from app import app as flask_app, add_sample_data  # noqa: E402
+from models import db  # noqa: E402
+from schema import migrate_database  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """The app on a freshly created schema with the sample data"""
+    with flask_app.app_context():
+        db.drop_all()
+        migrate_database()
+        add_sample_data()
+        db.session.remove()
+    yield flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
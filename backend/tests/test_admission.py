@@ -0,0 +1,111 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController
+
+CONFIG = {
+    'ADMISSION_WRITE_CONCURRENCY': 2,
+    'ADMISSION_POLL_CONCURRENCY': 1,
+    'ADMISSION_WRITE_WAIT': 0.5,
+    'ADMISSION_POLL_WAIT': 0,
+    'ADMISSION_WRITE_RATE': 100,
+    'ADMISSION_WRITE_BURST': 100,
+    'ADMISSION_POLL_RATE': 100,
+    'ADMISSION_POLL_BURST': 100,
+    'ADMISSION_MAX_CLIENTS': 10,
+}
+
+
+@pytest.fixture
+def controller(app):
+    with app.test_request_context():
+        yield AdmissionController(CONFIG)
+
+
+def test_poll_is_shed_when_its_class_is_full(controller):
+    assert controller.admit('a', 'poll') is None
+
+    rejection = controller.admit('b', 'poll')
+    assert rejection.status_code == 503
+    assert rejection.headers['Retry-After'] == '1'
+
+    # Write punya slot sendiri
+    assert controller.admit('b', 'write') is None
+
+
+def test_poll_yields_to_waiting_write(controller):
+    assert controller.admit('a', 'write') is None
+    assert controller.admit('b', 'write') is None
+
+    waiter = threading.Thread(target=controller.admit, args=('c', 'write'))
+    waiter.start()
+    while not controller.limiters['write'].waiting:
+        time.sleep(0.01)
+
+    assert controller.admit('d', 'poll').status_code == 503
+    controller.release('write')
+    waiter.join()
+    assert controller.stats()['classes']['write']['admitted'] == 3
+
+
+def test_client_over_its_rate_gets_429(controller):
+    controller.rates['poll'] = (1, 1)
+    assert controller.admit('a', 'poll') is None
+    controller.release('poll')
+
+    rejection = controller.admit('a', 'poll')
+    assert rejection.status_code == 429
+    assert controller.admit('b', 'poll') is None
+
+
+def test_default_limits_follow_worker_threads(app):
+    from app import WORKER_THREADS
+
+    assert app.config['ADMISSION_WRITE_CONCURRENCY'] == WORKER_THREADS
+    assert app.config['ADMISSION_POLL_CONCURRENCY'] < WORKER_THREADS
+
+
+def _page_load(people):
+    """GETs one dashboard tab walk sends (frontend/js/script.js), in order"""
+    return [
+        '/api/summary',
+        '/api/projects',
+        '/api/projects/1', '/api/projects/1/s-curve', '/api/projects/1/tasks',
+        '/api/non-projects',
+        '/api/manpower',
+        # loadTeamWorkloadChart: satu GET per orang, berurutan
+        *[f'/api/manpower/{i}/assignments' for i in range(1, people + 1)],
+        '/api/manpower/1', '/api/manpower/1/assignments',
+    ]
+
+
+def test_default_limits_admit_dashboard_page_loads(app, monkeypatch):
+    import types
+
+    import admission
+    from admission import init_admission
+    from flask import Flask
+
+    clock = [1000.0]
+    monkeypatch.setattr(admission, 'time', types.SimpleNamespace(
+        monotonic=lambda: clock[0], perf_counter=time.perf_counter
+    ))
+
+    page_app = Flask('page_load')
+    page_app.config.update({k: v for k, v in app.config.items() if k.startswith('ADMISSION_')})
+    page_app.config['ADMISSION_ENABLED'] = True
+    page_app.add_url_rule('/api/<path:path>', 'api', lambda path: {})
+    controller = init_admission(page_app)
+    client = page_app.test_client()
+
+    # Tiga pengguna di balik satu NAT membuka dashboard (tim 50 orang),
+    # lalu auto-refresh tab manpower tiap 30 detik selama 10 menit
+    statuses = [client.get(path).status_code for _ in range(3) for path in _page_load(50)]
+    for _ in range(20):
+        clock[0] += 30
+        statuses += [client.get(path).status_code for _ in range(3) for path in _page_load(50)[6:-2]]
+
+    assert set(statuses) == {200}
+    assert controller.stats()['classes']['poll']['rejected_rate'] == 0
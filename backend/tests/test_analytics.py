@@ -0,0 +1,31 @@
+import pytest
+
+from analytics import _metrics, earned_value_analysis
+
+
+@pytest.mark.parametrize('budget, earned_value, actual_cost, expected_eac', [
+    (1000, 0, 0, 1000),        # belum ada biaya: EAC = BAC
+    (1000, 500, 250, 500),     # CPI 2: EAC = BAC / CPI
+    (1000, 250, 500, 2000),    # CPI 0.5
+    (1000, 0, 300, 1300),      # biaya tanpa progress (CPI 0): AC + (BAC - EV)
+])
+def test_estimate_at_completion(budget, earned_value, actual_cost, expected_eac):
+    metrics = _metrics(float(budget), 0.0, float(earned_value), float(actual_cost))
+
+    assert float(metrics['eac']) == pytest.approx(expected_eac)
+    assert float(metrics['variance_at_completion']) == pytest.approx(budget - expected_eac)
+
+
+def test_cost_without_progress_is_not_reported_on_budget(app):
+    from models import db, Project
+
+    with app.app_context():
+        project = db.session.get(Project, 1)
+        project.progress, project.actual_cost = 0, 500
+        db.session.commit()
+
+        result = earned_value_analysis(entity='project', include_items=True)
+
+    item = next(i for i in result['items'] if i['id'] == 1)
+    assert item['cpi'] == 0
+    assert item['eac'] == pytest.approx(500 + item['budget'])
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+from archive import archive_completed
+from models import db, Project, Task
+
+NEW_PROJECT = {
+    'name': 'Project Baru', 'start_date': '2025-01-01', 'end_date': '2025-12-31', 'budget': 500
+}
+
+
+def _archive_project(app, project_id):
+    with app.app_context():
+        project = db.session.get(Project, project_id)
+        project.status, project.end_date = 'Completed', '2000-01-01'
+        db.session.commit()
+        assert archive_completed(older_than_days=30)['projects'] == 1
+
+
+def test_archived_rows_have_the_hot_row_shape(client, app):
+    hot_keys = {
+        'project': set(client.get('/api/projects/1').json),
+        'task': set(client.get('/api/projects/1/tasks').json[0]),
+    }
+    _archive_project(app, 1)
+
+    project = client.get('/api/projects/1?include_archived=1').json
+    tasks = client.get('/api/projects/1/tasks?include_archived=1').json
+
+    assert set(project) == hot_keys['project'] | {'archived'}
+    assert tasks and all(set(t) == hot_keys['task'] | {'archived'} for t in tasks)
+
+
+def test_archived_ids_are_not_reused(client, app):
+    with app.app_context():
+        last_id = db.session.execute(db.select(db.func.max(Project.id))).scalar()
+    _archive_project(app, last_id)
+
+    created = client.post('/api/projects', json=NEW_PROJECT).json
+    assert created['id'] > last_id
+
+
+def test_archived_children_of_reused_parent_id_are_hidden(client, app):
+    _archive_project(app, 1)
+
+    # Database lama (tanpa AUTOINCREMENT) bisa memberi id 1 ke project baru
+    with app.app_context():
+        db.session.add(Project(
+            id=1, status='In Progress', priority='High', created_at=datetime.utcnow() + timedelta(seconds=1),
+            **NEW_PROJECT
+        ))
+        db.session.commit()
+
+    tasks = client.get('/api/projects/1/tasks?include_archived=1').json
+    assert tasks == []
+
+
+def test_archived_detail_returns_the_newest_row_for_a_reused_id(client, app):
+    from models import ARCHIVE_TABLES
+
+    archive = ARCHIVE_TABLES[Project]
+    row = dict(status='Completed', priority='High', **NEW_PROJECT)
+    with app.app_context():
+        # Urutan insert sengaja terbalik dari urutan arsip
+        db.session.execute(archive.insert().values(id=99, archived_at=datetime(2025, 6, 1), **{**row, 'name': 'Baru'}))
+        db.session.execute(archive.insert().values(id=99, archived_at=datetime(2024, 6, 1), **{**row, 'name': 'Lama'}))
+        db.session.commit()
+
+    assert client.get('/api/projects/99?include_archived=1').json['name'] == 'Baru'
@@ -0,0 +1,53 @@
+from models import db, Task
+
+
+def _bulk(client, *operations):
+    return client.post('/api/bulk-update', json={'operations': list(operations)})
+
+
+def test_bulk_update_by_filter(client, app):
+    response = _bulk(client, {
+        'entity': 'task', 'filter': {'project_id': 1}, 'patch': {'priority': 'Critical'}
+    })
+
+    assert response.status_code == 200
+    with app.app_context():
+        tasks = Task.query.filter_by(project_id=1).all()
+        assert response.json['total_updated'] == len(tasks) > 0
+        assert {t.priority for t in tasks} == {'Critical'}
+        assert {t.version for t in tasks} == {2}
+
+
+def test_unknown_filter_key_is_rejected(client, app):
+    response = _bulk(client, {
+        'entity': 'task', 'filter': {'project_id': 1, 'projectid': 2}, 'patch': {'priority': 'Low'}
+    })
+
+    assert response.status_code == 400
+    assert 'projectid' in response.json['error']
+    with app.app_context():
+        assert Task.query.filter_by(priority='Low', project_id=1).count() == 0
+
+
+def test_filter_key_of_other_entity_is_rejected(client):
+    response = _bulk(client, {
+        'entity': 'assignment', 'filter': {'pic': 'Budi'}, 'patch': {'status': 'Active'}
+    })
+
+    assert response.status_code == 400
+
+
+def test_version_conflict_rolls_back_every_operation(client, app):
+    with app.app_context():
+        first, second = db.session.execute(db.select(Task.id).order_by(Task.id).limit(2)).scalars()
+
+    response = _bulk(
+        client,
+        {'entity': 'task', 'filter': {'ids': [first]}, 'patch': {'progress': 90}, 'versions': {first: 1}},
+        {'entity': 'task', 'filter': {'ids': [second]}, 'patch': {'progress': 90}, 'versions': {second: 7}},
+    )
+
+    assert response.status_code == 409
+    assert response.json['conflicts'] == [{'id': second, 'expected_version': 7, 'current_version': 1}]
+    with app.app_context():
+        assert db.session.get(Task, first).version == 1
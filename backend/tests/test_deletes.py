@@ -0,0 +1,81 @@
+from sqlalchemy import select
+
+from archive import archive_completed
+from models import db, Project, Task, Assignment
+
+
+def _all(model, **filters):
+    # include_deleted: lihat juga baris yang disembunyikan soft delete
+    return db.session.execute(
+        select(model).filter_by(**filters).execution_options(include_deleted=True)
+    ).scalars().all()
+
+
+def test_soft_delete_hides_project_and_children(client, app):
+    response = client.delete('/api/projects/1?soft=1')
+    assert response.status_code == 200
+
+    assert client.get('/api/projects/1').status_code == 404
+    assert all(t['project_id'] != 1 for t in client.get('/api/tasks').json)
+    with app.app_context():
+        assert _all(Project, id=1)[0].deleted_at is not None
+        assert _all(Task, project_id=1)
+
+
+def test_hard_delete_removes_children(client, app):
+    response = client.delete('/api/projects/1')
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert not _all(Project, id=1)
+        assert not _all(Task, project_id=1)
+        assert not _all(Assignment, project_id=1)
+
+
+def test_bulk_update_skips_children_of_soft_deleted_parent(client, app):
+    client.delete('/api/projects/1?soft=1')
+
+    response = client.post('/api/bulk-update', json={'operations': [
+        {'entity': 'task', 'filter': {'project_id': 1}, 'patch': {'priority': 'Low'}},
+        {'entity': 'assignment', 'filter': {'project_id': 1}, 'patch': {'status': 'Done'}},
+    ]})
+
+    assert response.status_code == 200
+    assert response.json['total_updated'] == 0
+    with app.app_context():
+        assert all(t.version == 1 for t in _all(Task, project_id=1))
+        assert all(a.version == 1 for a in _all(Assignment, project_id=1))
+
+
+def test_archive_skips_completed_tasks_of_soft_deleted_parent(client, app):
+    with app.app_context():
+        for task in _all(Task):
+            task.status, task.due_date = 'Completed', '2000-01-01'
+        db.session.commit()
+        hidden = {t.id for t in _all(Task, project_id=1)}
+
+    client.delete('/api/projects/1?soft=1')
+    with app.app_context():
+        archive_completed(older_than_days=30)
+        remaining = {t.id for t in _all(Task)}
+
+    # Hanya task milik project yang di-soft-delete yang tertinggal (menunggu purge)
+    assert remaining == hidden
+
+
+def test_purge_removes_soft_deleted_rows_in_batches(client, app):
+    from deletes import purge_deleted
+
+    with app.app_context():
+        project_ids = [p.id for p in _all(Project)]
+        tasks = len(_all(Task))
+    for project_id in project_ids:
+        client.delete(f'/api/projects/{project_id}?soft=1')
+
+    with app.app_context():
+        counts = purge_deleted(batch_size=1)
+
+        assert counts['projects'] == len(project_ids)
+        assert not _all(Project)
+        assert counts['tasks'] == tasks - len(_all(Task))
+        assert not [t for t in _all(Task) if t.project_id is not None]
@@ -0,0 +1,180 @@
+from flask import Flask
+from sqlalchemy import inspect, text
+import pytest
+
+from models import db
+from schema import MIGRATIONS, SCHEMA_VERSION, BASELINE_VERSION, get_schema_version, migrate_database
+
+# Skema sebelum ada versioning (db.create_all() dari versi awal aplikasi)
+BASELINE_DDL = [
+    '''CREATE TABLE project (
+        id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, description TEXT,
+        status VARCHAR(50) NOT NULL, priority VARCHAR(20) NOT NULL,
+        start_date VARCHAR(10) NOT NULL, end_date VARCHAR(10) NOT NULL,
+        budget FLOAT NOT NULL, actual_cost FLOAT, location VARCHAR(100),
+        latitude FLOAT, longitude FLOAT, progress FLOAT, created_at DATETIME,
+        PRIMARY KEY (id)
+    )''',
+    '''CREATE TABLE non_project (
+        id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, category VARCHAR(50) NOT NULL,
+        description TEXT, status VARCHAR(50) NOT NULL, start_date VARCHAR(10) NOT NULL,
+        end_date VARCHAR(10) NOT NULL, budget FLOAT NOT NULL, actual_cost FLOAT,
+        progress FLOAT, created_at DATETIME, PRIMARY KEY (id)
+    )''',
+    '''CREATE TABLE man_power (
+        id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, email VARCHAR(100),
+        position VARCHAR(100) NOT NULL, department VARCHAR(100) NOT NULL, skills TEXT,
+        availability FLOAT, total_hours INTEGER, created_at DATETIME, PRIMARY KEY (id)
+    )''',
+    '''CREATE TABLE task (
+        id INTEGER NOT NULL, name VARCHAR(100) NOT NULL, description TEXT,
+        project_id INTEGER, non_project_id INTEGER, pic VARCHAR(100) NOT NULL,
+        due_date VARCHAR(10) NOT NULL, status VARCHAR(50) NOT NULL, action_plan TEXT NOT NULL,
+        priority VARCHAR(20) NOT NULL, progress FLOAT, created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(project_id) REFERENCES project (id),
+        FOREIGN KEY(non_project_id) REFERENCES non_project (id)
+    )''',
+    '''CREATE TABLE assignment (
+        id INTEGER NOT NULL, manpower_id INTEGER NOT NULL, project_id INTEGER,
+        non_project_id INTEGER, role VARCHAR(100) NOT NULL, hours_per_week INTEGER NOT NULL,
+        start_date VARCHAR(10), end_date VARCHAR(10), status VARCHAR(50), created_at DATETIME,
+        PRIMARY KEY (id),
+        FOREIGN KEY(manpower_id) REFERENCES man_power (id),
+        FOREIGN KEY(project_id) REFERENCES project (id),
+        FOREIGN KEY(non_project_id) REFERENCES non_project (id)
+    )''',
+    '''INSERT INTO project (id, name, status, priority, start_date, end_date, budget, actual_cost, progress)
+       VALUES (1, 'Legacy Project', 'In Progress', 'High', '2024-01-01', '2024-12-31', 1000, 400, 40)''',
+    '''INSERT INTO task (id, name, project_id, pic, due_date, status, action_plan, priority, progress)
+       VALUES (1, 'Legacy Task', 1, 'Budi', '2024-06-30', 'In Progress', 'Lanjutkan', 'High', 50)''',
+]
+
+
+def _make_app(path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    return app
+
+
+def _schema(app):
+    with app.app_context():
+        inspector = inspect(db.engine)
+        return {
+            table: (
+                {column['name'] for column in inspector.get_columns(table)},
+                {index['name'] for index in inspector.get_indexes(table)},
+            )
+            for table in inspector.get_table_names()
+        }
+
+
+@pytest.fixture
+def fresh_schema(tmp_path):
+    app = _make_app(tmp_path / 'fresh.db')
+    with app.app_context():
+        assert migrate_database() == (0, SCHEMA_VERSION)
+    return _schema(app)
+
+
+@pytest.fixture
+def legacy_app(tmp_path):
+    app = _make_app(tmp_path / 'legacy.db')
+    with app.app_context():
+        for statement in BASELINE_DDL:
+            db.session.execute(text(statement))
+        db.session.commit()
+    return app
+
+
+def _counts(app):
+    with app.app_context():
+        return {
+            table: db.session.execute(text(f'SELECT COUNT(*) FROM {table}')).scalar()
+            for table in ('project', 'non_project', 'man_power', 'task', 'assignment')
+        }
+
+
+def test_baseline_database_upgrades_to_latest(legacy_app, fresh_schema):
+    before = _counts(legacy_app)
+
+    with legacy_app.app_context():
+        assert migrate_database() == (BASELINE_VERSION, SCHEMA_VERSION)
+        assert get_schema_version() == SCHEMA_VERSION
+        assert db.session.execute(text('SELECT version FROM data_version WHERE id = 1')).scalar() == 1
+
+    # Data lama tetap, tidak ada sample data yang ikut masuk
+    assert _counts(legacy_app) == before
+    assert _schema(legacy_app) == fresh_schema
+
+
+@pytest.mark.parametrize('stop_at', [version for version, _ in MIGRATIONS[:-1]])
+def test_partially_migrated_database_upgrades_to_latest(legacy_app, fresh_schema, stop_at):
+    with legacy_app.app_context():
+        migrate_database()
+        db.session.execute(text('UPDATE schema_version SET version = :v'), {'v': stop_at})
+        db.session.commit()
+
+        # Langkah yang sudah pernah jalan aman dijalankan ulang
+        assert migrate_database() == (stop_at, SCHEMA_VERSION)
+
+    assert _schema(legacy_app) == fresh_schema
+
+
+def test_migrated_rows_get_new_column_defaults(legacy_app):
+    with legacy_app.app_context():
+        migrate_database()
+        task = db.session.execute(text('SELECT version FROM task WHERE id = 1')).one()
+        project = db.session.execute(text('SELECT deleted_at FROM project WHERE id = 1')).one()
+
+    assert task.version == 1
+    assert project.deleted_at is None
+
+
+def test_cli_commands_skip_boot_migration(monkeypatch):
+    import click
+    from app import _imported_by_cli_command
+
+    assert not _imported_by_cli_command()
+
+    monkeypatch.setenv('FLASK_RUN_FROM_CLI', 'true')
+    with click.Context(click.Group('flask'), info_name='flask'):
+        assert _imported_by_cli_command()
+    # `flask run` tetap migrasi seperti gunicorn
+    with click.Context(click.Command('run'), info_name='run'):
+        assert not _imported_by_cli_command()
+
+
+def test_purge_on_migrated_database_with_children_added_mid_purge(legacy_app):
+    from sqlalchemy import event
+    from deletes import purge_deleted
+
+    with legacy_app.app_context():
+        migrate_database()
+        db.session.execute(text("UPDATE project SET deleted_at = '2024-01-01' WHERE id = 1"))
+        db.session.commit()
+
+        # Task baru untuk project tersembunyi masuk setelah sweep anak pertama;
+        # FK lama tanpa ON DELETE CASCADE akan menolak DELETE parent
+        inserted = []
+
+        def insert_late_child(session):
+            if inserted:
+                return
+            inserted.append(True)
+            with db.engine.begin() as conn:
+                conn.execute(text(
+                    "INSERT INTO task (name, project_id, pic, due_date, status, action_plan, priority) "
+                    "VALUES ('Telat', 1, 'Budi', '2024-06-30', 'In Progress', '-', 'High')"
+                ))
+
+        event.listen(db.session, 'after_commit', insert_late_child)
+        try:
+            counts = purge_deleted()
+        finally:
+            event.remove(db.session, 'after_commit', insert_late_child)
+
+        assert counts['projects'] == 1
+        assert counts['tasks'] == 2
+        assert db.session.execute(text('SELECT COUNT(*) FROM task')).scalar() == 0
@@ -0,0 +1,58 @@
+import pytest
+
+TOKEN = 'rahasia'
+
+
+@pytest.fixture
+def profiling(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'PROFILE_TOKEN', TOKEN)
+    return app
+
+
+def _stored(client):
+    return client.get('/api/profiles', headers={'X-Profile-Token': TOKEN}).json
+
+
+def test_requests_are_not_profiled_without_token(client, profiling):
+    response = client.get('/api/projects', headers={'X-Profile-Token': 'salah'})
+
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response.headers
+    assert 'X-Query-Count' not in response.headers
+    assert client.get('/api/projects?_profile=salah').headers.get('X-Profile-Id') is None
+    assert not [p for p in _stored(client) if p['path'].startswith('/api/projects')]
+
+
+def test_profile_headers_and_stored_profile(client, profiling):
+    response = client.get('/api/tasks', headers={'X-Profile-Token': TOKEN})
+
+    assert response.status_code == 200
+    assert int(response.headers['X-Query-Count']) == 1
+    assert float(response.headers['X-Query-Time-Ms']) >= 0
+    assert response.headers['X-Lazy-Load-Count'] == '0'
+
+    profile = client.get(
+        f'/api/profiles/{response.headers["X-Profile-Id"]}', headers={'X-Profile-Token': TOKEN}
+    ).json
+    assert profile['path'] == '/api/tasks'
+    assert profile['query_count'] == 1 and len(profile['queries']) == 1
+    assert profile['profile']
+
+
+def test_query_flag_token_is_not_stored(client, profiling):
+    response = client.get(f'/api/tasks?project_id=1&_profile={TOKEN}')
+    assert 'X-Profile-Id' in response.headers
+
+    profiles = _stored(client)
+    assert profiles[0]['path'] == '/api/tasks?project_id=1'
+    assert TOKEN not in str(profiles)
+
+
+@pytest.mark.parametrize('path', ['/api/profiles', '/api/profiles/abc'])
+def test_profiles_api_requires_token(client, profiling, path):
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={'X-Profile-Token': 'salah'}).status_code == 403
+
+
+def test_profiles_api_is_closed_when_profiling_is_off(client):
+    assert client.get('/api/profiles', headers={'X-Profile-Token': TOKEN}).status_code == 403
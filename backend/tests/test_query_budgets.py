@@ -0,0 +1,55 @@
+import pytest
+
+from models import db, Project, Task
+from profiling import assert_query_budget
+
+LIST_ENDPOINTS = [
+    '/api/projects',
+    '/api/non-projects',
+    '/api/tasks',
+    '/api/manpower',
+    '/api/assignments',
+]
+
+
+@pytest.mark.parametrize('path', LIST_ENDPOINTS)
+def test_list_endpoints_run_one_query(client, path):
+    response = assert_query_budget(client, 'GET', path, max_queries=1, max_lazy_loads=0)
+    assert response.status_code == 200
+
+
+def test_summary_query_count_does_not_grow_with_rows(client, app):
+    assert_query_budget(client, 'GET', '/api/summary', max_queries=12, max_lazy_loads=0)
+
+    with app.app_context():
+        for i in range(20):
+            project = Project(
+                name=f'Project {i}', status='In Progress', priority='High',
+                start_date='2024-01-01', end_date='2024-12-31', budget=1000
+            )
+            db.session.add(project)
+            db.session.flush()
+            db.session.add(Task(
+                name=f'Task {i}', project_id=project.id, pic='Budi', due_date='2024-06-30',
+                status='In Progress', action_plan='-', priority='High'
+            ))
+        db.session.commit()
+
+    response = assert_query_budget(client, 'GET', '/api/summary', max_queries=12, max_lazy_loads=0)
+    assert response.status_code == 200
+
+
+def test_hard_delete_is_set_based(client):
+    # get_or_404 + DELETE task + DELETE assignment + DELETE project + data_version
+    response = assert_query_budget(client, 'DELETE', '/api/projects/1', max_queries=5, max_lazy_loads=0)
+    assert response.status_code == 200
+
+
+def test_soft_delete_only_stamps_the_parent(client):
+    response = assert_query_budget(client, 'DELETE', '/api/projects/1?soft=1', max_queries=3, max_lazy_loads=0)
+    assert response.status_code == 200
+
+
+def test_budget_overrun_lists_the_statements(client):
+    with pytest.raises(AssertionError, match='budget 0'):
+        assert_query_budget(client, 'GET', '/api/projects', max_queries=0)
@@ -0,0 +1,82 @@
+import os
+import time
+
+
+def _wait_for(client, job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get(f'/api/reports/{job_id}')
+        if response.json['status'] in ('Done', 'Failed'):
+            return response
+        assert response.headers['Retry-After']
+        time.sleep(0.2)
+    raise AssertionError(f'report {job_id} tidak selesai dalam {timeout}s')
+
+
+def test_report_is_polled_until_done(client):
+    response = client.post('/api/reports', json={'format': 'xlsx', 'period': '2024-06'})
+    assert response.status_code == 202
+
+    job = _wait_for(client, response.json['id'])
+    assert job.json['status'] == 'Done', job.json.get('error')
+    assert 'Retry-After' not in job.headers
+
+    download = client.get(f'/api/reports/{job.json["id"]}/download')
+    assert download.status_code == 200
+    download.close()
+
+
+def test_same_report_is_reused_until_data_changes(client):
+    first = client.post('/api/reports', json={'format': 'pdf', 'period': '2024-06'}).json
+    _wait_for(client, first['id'])
+
+    again = client.post('/api/reports', json={'format': 'pdf', 'period': '2024-06'})
+    assert again.status_code == 200
+    assert again.json['id'] == first['id'] and again.json['cached']
+
+    client.post('/api/bulk-update', json={'operations': [
+        {'entity': 'task', 'filter': {'project_id': 1}, 'patch': {'progress': 99}}
+    ]})
+    changed = client.post('/api/reports', json={'format': 'pdf', 'period': '2024-06'})
+    assert changed.status_code == 202
+    assert changed.json['id'] != first['id']
+
+
+def test_data_version_is_bumped_after_commit_only(app):
+    from models import db, Task
+    from reports import current_data_version
+
+    with app.app_context():
+        before = current_data_version()
+
+        db.session.get(Task, 1).progress = 55
+        db.session.flush()
+        # UPDATE data_version tidak ikut di transaksi write
+        assert current_data_version() == before
+        db.session.commit()
+        assert current_data_version() == before + 1
+
+        db.session.get(Task, 1).progress = 60
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        assert current_data_version() == before + 1
+
+
+def test_reports_of_older_data_versions_are_removed(client, app):
+    from models import ReportJob
+
+    first = client.post('/api/reports', json={'format': 'xlsx', 'period': '2024-07'}).json
+    _wait_for(client, first['id'])
+    with app.app_context():
+        old_path = ReportJob.query.get(first['id']).file_path
+    assert os.path.exists(old_path)
+
+    client.post('/api/bulk-update', json={'operations': [
+        {'entity': 'task', 'filter': {'project_id': 1}, 'patch': {'progress': 98}}
+    ]})
+    second = client.post('/api/reports', json={'format': 'xlsx', 'period': '2024-07'}).json
+    assert _wait_for(client, second['id']).json['status'] == 'Done'
+
+    assert not os.path.exists(old_path)
+    assert client.get(f'/api/reports/{first["id"]}').status_code == 404